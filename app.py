@@ -1,15 +1,38 @@
 import streamlit as st
-from utils import extract_text_from_pdf, extract_rewrites, replace_bullets_whole_text, ats_score
-from openai import OpenAI
-from prompts import get_roast_prompt
+from utils import extract_rewrites, jd_index
 import re
-from vision_ocr import pdf_pages_to_base64_images
-from openai.types.chat import ChatCompletionMessageParam
-from typing import Sequence
+import time
+import metrics
+from cache import cached_resume_document
+from resume_document import DocumentScorer, ats_score_document
+import hashlib
+import os
+from response_cache import ResponseCache
+from compaction import CompactionPolicy
+from jobs import JobRunner, ACTIVE, DONE
+from docx_ingest import DOCX_MIME
+from session_memory import SessionMemoryError, ledger
+from uploads import StoredUpload
+from pipeline import review_job_id, run_review
+from text_layer import ROUTE_TEXT, ROUTE_VISION
+from vision_ocr import PayloadPolicy, IMAGE_FORMATS
 
 st.set_page_config(page_title="AI Resume Roaster", layout="centered")
 
 st.title("🔥 AI Resume Roaster + Rewriter")
+
+# Per-session memory accounting; the handle releases this session's charges when its state is dropped
+if "memory_session" not in st.session_state:
+    st.session_state.memory_session = ledger.open_session()
+session_id = st.session_state.memory_session.id
+
+def charge_session(key, nbytes):
+    """Record what this session keeps resident; stops the page if it goes over SESSION_MEMORY_MAX_MB."""
+    try:
+        ledger.charge(session_id, key, nbytes)
+    except SessionMemoryError as exc:
+        st.error(str(exc))
+        st.stop()
 st.markdown(
     """
     Upload your resume, and pick your target job role. 
@@ -18,15 +41,18 @@ st.markdown(
 )
 
 #Upload Resume
-uploaded_file = st.file_uploader("📄 Upload your resume as PDF", type=["pdf"])
+# Word files are read natively (docx_ingest); page images are only rendered if the vision route needs them
+RESUME_TYPES = {".pdf": "application/pdf", ".docx": DOCX_MIME}
+uploaded_file = st.file_uploader("📄 Upload your resume as PDF or Word (.docx)", type=["pdf", "docx"])
 if uploaded_file:
-    if not uploaded_file.name.lower().endswith('.pdf'):
-        st.error("Only PDF files are allowed. Please upload a PDF resume.")
+    extension = os.path.splitext(uploaded_file.name.lower())[1]
+    if extension not in RESUME_TYPES:
+        st.error("Only PDF and Word (.docx) files are allowed. Please upload a PDF or DOCX resume.")
         uploaded_file = None
         st.stop()
     
-    if uploaded_file.type != "application/pdf":
-        st.error("Invalid file type. Please upload a valid PDF file.")
+    if uploaded_file.type != RESUME_TYPES[extension]:
+        st.error(f"Invalid file type. Please upload a valid {extension[1:].upper()} file.")
         uploaded_file = None
         st.stop()
     
@@ -37,7 +63,9 @@ if uploaded_file:
         uploaded_file = None
         st.stop()
     
-    st.success(f"✅ PDF uploaded successfully! Size: {uploaded_file.size / (1024*1024):.1f}MB")
+    # Streamlit buffers the upload in memory for as long as the widget holds it
+    charge_session("upload_buffer", uploaded_file.size)
+    st.success(f"✅ {extension[1:].upper()} uploaded successfully! Size: {uploaded_file.size / (1024*1024):.1f}MB")
 
 #Job Role Dropdown
 job_role = st.selectbox(
@@ -57,7 +85,7 @@ st.caption("Fields marked with * are required")
 if uploaded_file:
     st.success("✅ Resume uploaded successfully!")
     resume_text = None
-    st.info("ℹ️ PDF preview will be generated in the next step.")
+    st.info("ℹ️ Resume preview will be generated in the next step.")
 
     if st.button("Resume Extraction"):
         if not job_role:
@@ -72,10 +100,16 @@ if uploaded_file:
             st.session_state.resume_uploaded = True
             st.session_state.job_role = job_role
             st.session_state.job_description = job_description
-            st.session_state.uploaded_file = uploaded_file
+            # Spool to a temp file once; later steps read it from disk instead of copying the bytes.
+            # The previous upload is not closed here: a background review may still be rendering
+            # from it. Its file is removed once neither this session nor a running job refers to it.
+            st.session_state.resume_upload = StoredUpload.from_stream(
+                uploaded_file, uploaded_file.name, uploaded_file.type,
+            )
             st.success("✅ Moving to Step 2: AI Feedback...")
             st.rerun()
 else:
+    charge_session("upload_buffer", 0)
     st.info("Please upload a resume to get started.")
 
 
@@ -84,7 +118,51 @@ api_key = st.secrets.get("OPENAI_API_KEY")
 if not api_key:
     st.error("OpenAI API key not found. Please add it to your Streamlit secrets.")
     st.stop()
-client = OpenAI(api_key=api_key)
+
+@st.cache_resource
+def get_openai_client(api_key):
+    """
+    One client per process (and key), reused by every rerun and session.
+
+    The client's HTTP pool keeps connections alive between reviews, so only
+    the first request pays for the TLS handshake; the openai import itself
+    is deferred until the client is first needed.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, max_retries=3)
+
+@st.cache_resource
+def get_model_gateway(api_key):
+    # Every session's model calls share one gateway: identical in-flight calls are
+    # coalesced and MODEL_RPM / MODEL_TPM are enforced with fair per-session queuing
+    from model_gateway import ModelGateway
+    return ModelGateway(get_openai_client(api_key))
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
+@st.cache_resource
+def get_job_catalog():
+    # Optional: a catalog built with `python job_catalog.py build`, memory-mapped once per process
+    path = os.environ.get("JOB_CATALOG_DIR")
+    if not path:
+        return None
+    from job_catalog import JobCatalog   # pulls in NumPy
+    return JobCatalog(path)
+
+@st.cache_resource
+def get_job_runner():
+    return JobRunner()
+
+@st.cache_resource
+def start_metrics_server():
+    # One /metrics endpoint per process, only when METRICS_PORT is set
+    return metrics.serve_metrics() if metrics.METRICS_PORT else None
+
+start_metrics_server()
+
+JOB_POLL_SECONDS = 0.5
 
 def get_resume_level(score):
     """Get resume level based on score"""
@@ -161,17 +239,92 @@ def display_resume_score(score, level, color):
     st.progress(score / 100)
     st.caption(f"Progress to next level: {score}/100")
 
+def show_job_progress(job, resume_doc, scoring_jd):
+    """Render a running job's partial output; the next poll redraws it."""
+    partial = job.get("partial") or {}
+    st.info(f"⏳ {partial.get('stage', 'Queued')}… (job {job['id'][:8]})")
+    if partial.get("text"):
+        st.subheader("📋 AI Resume Review")
+        st.markdown(partial["text"] + "▌")
+    if partial.get("rewrites"):
+        preview = resume_doc.copy()
+        preview.apply_rewrites(partial["rewrites"])
+        st.subheader("Updated Resume Preview")
+        st.code(preview.text())
+        st.metric("ATS score so far", ats_score_document(preview, scoring_jd))
+        st.caption(f"{len(partial['rewrites'])} bullet rewrites ready")
+
+def get_review_state(resume_doc, feedback, scoring_jd):
+    """
+    Rewrites applied to the resume, with a live scorer, kept across reruns.
+
+    Built once per (resume, feedback, JD); afterwards accepting or rejecting
+    a rewrite edits one line and the scorer applies it as a delta.
+    """
+    parts = (resume_doc.text(), feedback, scoring_jd.jd_txt, str(scoring_jd.semantic))
+    key = hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+    state = st.session_state.get("review_state")
+    if state and state["key"] == key:
+        return state
+
+    with metrics.span("extract_rewrites"):
+        rewrites = extract_rewrites(feedback)
+    with metrics.span("score_original"):
+        scorer = DocumentScorer(resume_doc, scoring_jd)
+        original_score = scorer.total()
+    original = [ln.content for ln in resume_doc.lines]
+    with metrics.span("match_bullets"):
+        report = resume_doc.apply_rewrites(rewrites)
+    edits = [
+        {"line": r["line"], "before": r["before"], "after": r["after"], "accepted": True}
+        for r in report if r["line"] is not None
+    ]
+    state = {
+        "key": key, "doc": resume_doc, "scorer": scorer, "report": report,
+        "original": original, "original_score": original_score, "edits": edits,
+    }
+    st.session_state.review_state = state
+    return state
+
+def _line_content(review, line):
+    # The last accepted rewrite of a line wins, as when all are applied in order
+    content = review["original"][line]
+    for edit in review["edits"]:
+        if edit["line"] == line and edit["accepted"]:
+            content = edit["after"]
+    return content
+
+def apply_rewrite_choices(review):
+    """Sync the document with the accept/reject checkboxes, one line per change."""
+    for k, edit in enumerate(review["edits"]):
+        accepted = st.session_state.get(f"keep_{review['key'][:12]}_{k}", edit["accepted"])
+        if accepted != edit["accepted"]:
+            edit["accepted"] = accepted
+            review["doc"].replace(edit["line"], _line_content(review, edit["line"]))
+
+def show_rewrite_choices(review):
+    scorer = review["scorer"]
+    for k, edit in enumerate(review["edits"]):
+        delta = scorer.contribution(edit["line"], edit["after"], review["original"][edit["line"]])
+        moved = ", ".join(f"{name} {value:+.1f}" for name, value in delta.items() if name != "total" and value)
+        st.checkbox(
+            f"{edit['after']}  ·  score {delta['total']:+d}" + (f" ({moved})" if moved else ""),
+            value=edit["accepted"],
+            key=f"keep_{review['key'][:12]}_{k}",
+            help=f"Before: {edit['before']}",
+        )
+
 # Step 2: Run AI Roast if resume is uploaded
 if st.session_state.get("resume_uploaded"):
     st.header("Step 2: AI Resume Critique + Rewrite")
 
-    uploaded_file = st.session_state.uploaded_file
+    resume_upload = st.session_state.resume_upload
     job_role = st.session_state.job_role
     job_description = st.session_state.get("job_description", "")
-    resume_text=''
-    # Extract text from uploaded resume
-    if uploaded_file.name.endswith('.pdf'):
-        resume_text = extract_text_from_pdf(uploaded_file)
+    # Parse the uploaded resume once into a document (cached by content hash across reruns)
+    resume_doc = cached_resume_document(resume_upload)
+    resume_text = resume_doc.text()
+    charge_session("document", resume_doc.nbytes())
 
     st.subheader("🔍 Resume Extracted")
     
@@ -181,54 +334,142 @@ if st.session_state.get("resume_uploaded"):
     #MODEL SETTINGS
     st.subheader("AI Settings")
     model_choice = st.selectbox("Choose GPT Model", ["gpt-4o"])
+    two_phase = st.checkbox("Fast mode: rewrites and roast as two parallel calls", value=False)
+    if two_phase:
+        rewrite_model = st.selectbox("Rewrite model (structured JSON)", ["gpt-4o-mini", "gpt-4o"])
+        rewrite_temperature = st.slider("Rewrite temperature", 0.0, 1.0, 0.3, 0.1)
+        stream_response = False
+    else:
+        stream_response = st.checkbox("Stream the review as it is written", value=True)
+    force_fresh = st.checkbox("Force a fresh review (ignore cached answers)", value=False)
+    semantic_keywords = st.checkbox(
+        "Count skill synonyms as keyword matches (k8s = Kubernetes, ML = machine learning)", value=False
+    )
+    scoring_jd = jd_index(job_description, semantic_keywords)
+
+    with st.expander("✂️ Prompt compaction", expanded=False):
+        compact_prompt = st.checkbox("Trim JD boilerplate, duplicates and contact details", value=False)
+        prompt_token_budget = st.number_input("Resume + JD token budget (0 = no limit)", 0, 16000, 0, step=250,
+                                              disabled=not compact_prompt)
+    compaction_policy = CompactionPolicy(token_budget=prompt_token_budget or None) if compact_prompt else None
+
+    with st.expander("🖼️ Page image settings", expanded=False):
+        route_labels = {"auto": "Auto (only pages with a poor text layer)", ROUTE_TEXT: "Text only", ROUTE_VISION: "Always send every page"}
+        route_mode = st.selectbox("Send page images", list(route_labels), format_func=route_labels.get)
+        image_format = st.selectbox("Image format", list(IMAGE_FORMATS), index=1)
+        image_quality = st.slider("JPEG/WebP quality", 40, 95, 85)
+        image_max_dim = st.select_slider("Max image side (px)", [768, 1024, 1280, 1600, 2048], value=1600)
+        image_grayscale = st.checkbox("Grayscale", value=False)
+        image_token_budget = st.number_input("Image token budget per request (0 = unlimited)", 0, 20000, 0, step=255)
+    payload_policy = PayloadPolicy(
+        max_dim=image_max_dim,
+        dpi=None,
+        image_format=image_format,
+        quality=image_quality,
+        grayscale=image_grayscale,
+        max_total_tokens=image_token_budget or None,
+    )
 
     if st.button("🔥 Get Feedback from AI"):
-        with st.spinner("AI is analyzing your resume... This may take a few moments."):
-            prompt = get_roast_prompt(resume_text, job_role, job_description)
-
-            try:
-                if uploaded_file.name.lower().endswith(".pdf"):
-                    uploaded_file.seek(0)  # ensure pointer at start before reading
-                    pdf_bytes = uploaded_file.read()
-                    if not pdf_bytes:
-                        raise ValueError("Uploaded PDF appears to be empty. Please re-upload the file.")
-                    img_msgs = pdf_pages_to_base64_images(pdf_bytes)
-                    uploaded_file.seek(0)  # reset pointer for any later reads
-
-                    # Build messages for vision model
-                    messages = [{
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            *img_msgs 
-                        ]
-                    }]
-                    messages_cast: Sequence[ChatCompletionMessageParam] = messages  # type: ignore
-                    response = client.chat.completions.create(
-                        model=model_choice,             
-                        messages=messages_cast,
-                        temperature=0.7,
-                    )
-                
-                    feedback = response.choices[0].message.content
-                    st.session_state.feedback = feedback
-                    st.rerun()
+        review_settings = dict(
+            model=model_choice,
+            route_mode=route_mode,
+            payload_policy=payload_policy,
+            compaction_policy=compaction_policy,
+            two_phase=two_phase,
+            rewrite_model=rewrite_model if two_phase else None,
+            rewrite_temperature=rewrite_temperature if two_phase else None,
+            stream=stream_response,
+        )
+        # Identical requests share a job, so a rerun or reconnect attaches to the running one
+        job_id = review_job_id(resume_upload, job_role, job_description, **review_settings)
+        get_job_runner().submit(
+            job_id, run_review, get_model_gateway(api_key).client_for(session_id), resume_upload, resume_text, job_role, job_description,
+            response_cache=get_response_cache(), force_fresh=force_fresh, force=force_fresh,
+            memory=ledger.charger(session_id), **review_settings,
+        )
+        st.session_state.job_id = job_id
+        st.session_state.feedback = None
+        st.rerun()
+
+    # Poll the background job; the script thread never waits on the model
+    if st.session_state.get("job_id"):
+        job = get_job_runner().get(st.session_state.job_id)
+        if job is None:
+            st.session_state.job_id = None
+        elif job["status"] in ACTIVE:
+            show_job_progress(job, resume_doc, scoring_jd)
+            gateway = get_model_gateway(api_key).stats(session_id)
+            if gateway["queued"]:
+                st.caption(f"Waiting for a model slot (turn {gateway['queue_position']} of "
+                           f"{gateway['queued_sessions']} waiting sessions)")
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
+        elif job["status"] == DONE:
+            result = job["result"]
+            st.session_state.feedback = result["feedback"]
+            st.session_state.route_info = result["route_info"]
+            st.session_state.payload_report = result["payload_report"]
+            st.session_state.prompt_report = result["prompt_report"]
+            st.session_state.timings = result.get("timings")
+            st.session_state.job_id = None
+        else:
+            st.error(f"Error calling OpenAI API: {job['error']}")
+            st.session_state.job_id = None
 
-            except Exception as e:
-                st.error(f"Error calling OpenAI API: {e}")
-    
     # Display feedback if available
     if "feedback" in st.session_state and st.session_state.feedback:
         st.subheader("📋 AI Resume Review")
         st.markdown(st.session_state.feedback)
 
-        rewrites      = extract_rewrites(st.session_state.feedback)
-        updated_text  = replace_bullets_whole_text(resume_text, rewrites)
+        if st.session_state.get("route_info"):
+            with st.expander("Image payload sent to the model", expanded=False):
+                route = st.session_state.route_info
+                st.caption(
+                    ("Cached answer · " if route.get("cached") else "")
+                    + f"Route: {route['route']} · images for pages {route['image_pages'] or 'none'} · "
+                    f"{route['image_bytes_sent'] / 1024:.0f} KB sent · "
+                    f"~{route['est_image_tokens_saved']} image tokens saved"
+                )
+                if st.session_state.get("payload_report"):
+                    st.table(st.session_state.payload_report)
+
+        if st.session_state.get("prompt_report"):
+            report = st.session_state.prompt_report
+            st.caption(
+                f"Prompt compaction ({report['tokenizer']}): "
+                f"{report['prompt_tokens_before']} → {report['prompt_tokens_after']} prompt tokens · "
+                f"resume {report['resume_tokens_before']} → {report['resume_tokens_after']} · "
+                f"JD {report['jd_tokens_before']} → {report['jd_tokens_after']}"
+            )
+
+        with metrics.trace("render") as render_trace:
+            review = get_review_state(resume_doc, st.session_state.feedback, scoring_jd)
+            with metrics.span("apply_choices"):
+                apply_rewrite_choices(review)
+            updated_text = review["doc"].text()
+            score = review["scorer"].total()
+        charge_session("review", review["doc"].nbytes() + len(st.session_state.feedback))
 
         # Show the improved resume
         st.subheader("Updated Resume Preview")
         with st.expander("Click to view updated resume", expanded=False):
             st.code(updated_text)
+        with st.expander("🔑 JD keyword matches", expanded=False):
+            st.table(scoring_jd.keyword_matches(updated_text))
+        with st.expander("How each rewrite was matched", expanded=False):
+            st.table([{k: r[k] for k in ("method", "score", "line", "before")} for r in review["report"]])
+        with st.expander(f"✅ Choose rewrites to keep (original score {review['original_score']})", expanded=False):
+            show_rewrite_choices(review)
+
+        catalog = get_job_catalog()
+        if catalog is not None:
+            with st.expander(f"🧭 Best-fit roles from {len(catalog)} stored postings", expanded=False):
+                st.table([
+                    {"title": r["title"], "id": r["id"], "similarity": r["similarity"], "ATS": r["ats"],
+                     "matched keywords": ", ".join(r["matched_keywords"])}
+                    for r in catalog.search(updated_text, k=10, semantic=semantic_keywords)
+                ])
 
         # Optional download
         st.download_button(
@@ -238,13 +479,31 @@ if st.session_state.get("resume_uploaded"):
             mime="text/plain"
         )
 
-        # Calculate and display resume score
-        score = ats_score(updated_text, job_description)
+        # Display the resume score computed above
         level, color = get_resume_level(score)
         display_resume_score(score, level, color)
+
+        with st.expander("🐞 Debug: request timings", expanded=False):
+            timings = st.session_state.get("timings")
+            if timings:
+                st.caption(f"Review: {timings['total_ms']:.0f} ms total")
+                st.table(timings["spans"])
+                if timings["counters"]:
+                    st.json(timings["counters"])
+            st.caption("Post-processing on this page render")
+            st.table(render_trace.to_dict()["spans"])
+            resident = ledger.breakdown(session_id)
+            st.caption(
+                f"Session memory: {sum(resident.values()) / 1024:.0f} KB resident ("
+                + ", ".join(f"{k} {v / 1024:.0f} KB" for k, v in resident.items()) + ")"
+            )
+            st.caption("Model gateway (totals across sessions, plus this session's queue)")
+            st.json(get_model_gateway(api_key).stats(session_id))
                 
         # Reset button to get new feedback
         if st.button("Get New Feedback"):
             st.session_state.feedback = None
+            st.session_state.review_state = None
             st.session_state.current_score = None
+            charge_session("review", 0)
             st.rerun()
\ No newline at end of file
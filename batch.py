@@ -0,0 +1,172 @@
+"""
+Headless batch review of a directory of PDF resumes against one job description.
+
+Runs extract_text_from_pdf -> get_roast_prompt -> chat completion ->
+extract_rewrites -> replace_bullets_whole_text -> ats_score for every PDF,
+with at most --concurrency resumes in flight, and writes one JSON object
+per resume to --out as results complete.
+
+    python batch.py resumes/ --jd jd.txt --role "Data Scientist" --out results.jsonl
+    python batch.py resumes/ --jd jd.txt --base-url http://127.0.0.1:8000/v1   # mock_llm_server.py
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import time
+
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, InternalServerError, RateLimitError
+
+import metrics
+from pipeline import request_bytes
+from prompts import get_roast_prompt
+from utils import ats_score, extract_rewrites, extract_text_from_pdf, job_role_to_industry, match_bullets
+from vision_ocr import pdf_pages_to_base64_images
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+
+def retry_delay(exc: Exception, attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Seconds to wait before retry `attempt`: the server's Retry-After if given, else jittered backoff."""
+    response = getattr(exc, "response", None)
+    if response is not None:
+        try:
+            return min(cap, float(response.headers.get("retry-after")))
+        except (TypeError, ValueError):
+            pass
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+async def complete_with_retry(client: AsyncOpenAI, max_retries: int = 6, **kwargs):
+    for attempt in range(max_retries + 1):
+        try:
+            return await client.chat.completions.create(**kwargs)
+        except RETRYABLE_ERRORS as exc:
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(retry_delay(exc, attempt))
+
+
+def _read_resume(path: str, vision: bool):
+    with open(path, "rb") as fh:
+        pdf_bytes = fh.read()
+    resume_text = extract_text_from_pdf(io.BytesIO(pdf_bytes))
+    images = pdf_pages_to_base64_images(pdf_bytes) if vision else []
+    return resume_text, images
+
+
+async def review_one(client, semaphore, path, job_role, job_description, *,
+                     model, temperature, vision, max_retries):
+    record = {"file": os.path.basename(path)}
+    async with semaphore:
+        started = time.perf_counter()
+        # Each task runs in its own context, so this trace only collects this resume's spans
+        with metrics.trace("batch_review", file=record["file"]):
+            try:
+                # pdfplumber/poppler work stays off the event loop
+                resume_text, images = await asyncio.to_thread(_read_resume, path, vision)
+                prompt = get_roast_prompt(resume_text, job_role, job_description, with_images=vision)
+                messages = [{"role": "user", "content": [{"type": "text", "text": prompt}, *images]}]
+
+                llm_started = time.perf_counter()
+                with metrics.span("model_call", model=model, request_bytes=request_bytes(messages)):
+                    response = await complete_with_retry(
+                        client, max_retries=max_retries, model=model, messages=messages, temperature=temperature,
+                    )
+                record["llm_seconds"] = round(time.perf_counter() - llm_started, 3)
+                metrics.record_usage(response.usage, model)
+
+                feedback = response.choices[0].message.content or ""
+                rewrites = extract_rewrites(feedback)
+                updated_text, matches = match_bullets(resume_text, rewrites)
+                record.update(
+                    original_score=ats_score(resume_text, job_description),
+                    score=ats_score(updated_text, job_description),
+                    rewrites=rewrites,
+                    matches=matches,
+                    feedback=feedback,
+                    updated_text=updated_text,
+                )
+            except Exception as exc:
+                record["error"] = f"{type(exc).__name__}: {exc}"
+                metrics.count("errors_total", stage="batch_review", error=type(exc).__name__)
+        record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+async def run_batch(pdf_dir: str, job_description: str, job_role: str, out_path: str, *,
+                    model: str = "gpt-4o", temperature: float = 0.7, concurrency: int = 8,
+                    vision: bool = False, base_url: str | None = None, api_key: str | None = None,
+                    max_retries: int = 6) -> dict:
+    """Review every PDF in `pdf_dir`, append results to `out_path` as JSONL and return a summary."""
+    paths = sorted(
+        os.path.join(pdf_dir, name) for name in os.listdir(pdf_dir) if name.lower().endswith(".pdf")
+    )
+    api_key = api_key or os.environ.get("OPENAI_API_KEY") or ("sk-local" if base_url else None)
+    # Retries are handled here so Retry-After and backoff apply across the whole batch
+    client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    started = time.perf_counter()
+    done = failed = 0
+    try:
+        with open(out_path, "w", encoding="utf-8") as out:
+            tasks = [
+                asyncio.create_task(review_one(
+                    client, semaphore, path, job_role, job_description,
+                    model=model, temperature=temperature, vision=vision, max_retries=max_retries,
+                ))
+                for path in paths
+            ]
+            for fut in asyncio.as_completed(tasks):
+                record = await fut
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                done += 1
+                failed += "error" in record
+    finally:
+        await client.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "resumes": done,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "resumes_per_second": round(done / elapsed, 3) if elapsed else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf_dir", help="directory of PDF resumes")
+    parser.add_argument("--jd", required=True, help="path to a job description text file")
+    parser.add_argument("--role", default="Software Engineer", choices=sorted(job_role_to_industry))
+    parser.add_argument("--out", default="results.jsonl")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-retries", type=int, default=6)
+    parser.add_argument("--vision", action="store_true", help="also send page images, as the app does")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint, e.g. a local mock")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--metrics-out", default=None, help="write Prometheus-format metrics here when done")
+    args = parser.parse_args(argv)
+
+    with open(args.jd, "r", encoding="utf-8") as fh:
+        job_description = fh.read()
+
+    summary = asyncio.run(run_batch(
+        args.pdf_dir, job_description, args.role, args.out,
+        model=args.model, temperature=args.temperature, concurrency=args.concurrency,
+        vision=args.vision, base_url=args.base_url, api_key=args.api_key, max_retries=args.max_retries,
+    ))
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as fh:
+            fh.write(metrics.registry.prometheus_text())
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
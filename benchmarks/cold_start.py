@@ -0,0 +1,128 @@
+"""
+Cold-start and per-rerun overhead budget for the Streamlit app.
+
+Three measurements, reported as JSON like benchmarks/run.py:
+
+- imports: time to import the modules app.py loads at startup, each sample
+  in a fresh interpreter, plus which heavy dependencies got pulled in
+  (they should load on first use, not at import)
+- first_run: the app script's first run under streamlit.testing AppTest
+- rerun: later runs of the same session (what every widget interaction
+  pays), on the landing page and on Step 2 with a resume loaded
+
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --import-budget-ms 150 --rerun-budget-ms 300   # exit 1 if over
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What app.py imports before rendering anything
+APP_MODULES = ("utils", "metrics", "cache", "resume_document", "response_cache", "compaction",
+               "jobs", "pipeline", "text_layer", "vision_ocr", "docx_ingest", "prompts")
+# Must not be loaded by importing APP_MODULES
+HEAVY_MODULES = ("pdfplumber", "pdfminer", "pdf2image", "PIL", "docx", "openai", "numpy", "tiktoken", "http.server")
+
+IMPORT_PROBE = f"""
+import sys, time, json
+start = time.perf_counter()
+import {", ".join(APP_MODULES)}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _summary(samples_ms: list[float]) -> dict:
+    samples_ms = sorted(samples_ms)
+    p95 = samples_ms[min(len(samples_ms) - 1, round(0.95 * (len(samples_ms) - 1)))]
+    return {"runs": len(samples_ms), "p50_ms": round(statistics.median(samples_ms), 2), "p95_ms": round(p95, 2)}
+
+
+def measure_imports(repeat: int = 10) -> dict:
+    samples, heavy = [], set()
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True,
+                             cwd=ROOT, check=True).stdout
+        probe = json.loads(out.strip().splitlines()[-1])
+        samples.append(probe["ms"])
+        heavy.update(probe["heavy"])
+    return {**_summary(samples), "heavy_modules_loaded": sorted(heavy)}
+
+
+def measure_reruns(repeat: int = 10) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks.synthetic import build_corpus
+    from uploads import StoredUpload
+
+    def timed_run(at) -> float:
+        start = time.perf_counter()
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"app raised: {at.exception[0].message}")
+        return (time.perf_counter() - start) * 1000
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.secrets["OPENAI_API_KEY"] = "sk-benchmark"
+    first_run = timed_run(at)
+    landing = [timed_run(at) for _ in range(repeat)]
+
+    # Step 2 with a resume already extracted, as after "Resume Extraction"
+    at.session_state["resume_uploaded"] = True
+    at.session_state["resume_upload"] = StoredUpload.from_bytes(build_corpus()["p2_dense"], "resume.pdf")
+    at.session_state["job_role"] = "Software Engineer"
+    at.session_state["job_description"] = "Backend engineer with Python, SQL and Kubernetes experience."
+    step2_first = timed_run(at)
+    step2 = [timed_run(at) for _ in range(repeat)]
+    return {
+        "first_run_ms": round(first_run, 2),
+        "rerun_landing": _summary(landing),
+        "step2_first_ms": round(step2_first, 2),
+        "rerun_step2": _summary(step2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--import-budget-ms", type=float, default=None, help="fail if import p50 exceeds this")
+    parser.add_argument("--rerun-budget-ms", type=float, default=None, help="fail if a rerun p50 exceeds this")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = {"imports": measure_imports(args.repeat)}
+    try:
+        report["app"] = measure_reruns(args.repeat)
+    except ImportError as exc:
+        report["app"] = {"skipped": f"{type(exc).__name__}: {exc}"}
+
+    failures = []
+    if report["imports"]["heavy_modules_loaded"]:
+        failures.append(f"heavy modules loaded at import: {report['imports']['heavy_modules_loaded']}")
+    if args.import_budget_ms is not None and report["imports"]["p50_ms"] > args.import_budget_ms:
+        failures.append(f"import p50 {report['imports']['p50_ms']} ms > {args.import_budget_ms} ms")
+    if args.rerun_budget_ms is not None and "skipped" not in report["app"]:
+        for name in ("rerun_landing", "rerun_step2"):
+            if report["app"][name]["p50_ms"] > args.rerun_budget_ms:
+                failures.append(f"{name} p50 {report['app'][name]['p50_ms']} ms > {args.rerun_budget_ms} ms")
+    report["failures"] = failures
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+Benchmarks for the extraction, rasterization, rewrite and scoring hot paths.
+
+Each case runs in its own spawned process so peak RSS is per case, on the
+synthetic corpus from benchmarks/synthetic.py and the sample JD and canned
+feedback in benchmarks/data. Results are JSON: p50/p95/mean latency per
+call, throughput in the case's unit (pages, rewrites, resumes) and peak RSS.
+
+    python -m benchmarks.run --out bench.json                      # record a baseline
+    python -m benchmarks.run --compare bench.json --tolerance 0.2  # exit 1 on regression
+    python -m benchmarks.run --only 'extract_text|ats_score' --repeat 50
+
+Rasterization cases need poppler on PATH; without it they are reported as
+skipped rather than failing the run.
+"""
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+JD_FILE = "jd_backend_engineer.txt"
+FEEDBACK_FILE = "feedback_backend_engineer.md"
+
+RASTER_SETTINGS = [(100, 800), (150, 1280), (200, 1600)]   # (dpi, max_dim)
+MIN_SAMPLE_SECONDS = 0.005    # fast calls are looped so one sample is at least this long
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(DATA_DIR, name), "r", encoding="utf-8") as fh:
+        return fh.read()
+
+
+class Inputs:
+    """Corpus, texts, JD and feedback, built lazily inside the case's process."""
+
+    def __init__(self):
+        self._corpus = None
+        self._docx_corpus = None
+        self._texts = {}
+
+    @property
+    def corpus(self) -> dict[str, bytes]:
+        if self._corpus is None:
+            from benchmarks.synthetic import build_corpus
+            self._corpus = build_corpus()
+        return self._corpus
+
+    @property
+    def docx_corpus(self) -> dict[str, bytes]:
+        if self._docx_corpus is None:
+            from benchmarks.synthetic import build_docx_corpus
+            self._docx_corpus = build_docx_corpus()
+        return self._docx_corpus
+
+    def text(self, name: str) -> str:
+        if name not in self._texts:
+            from utils import extract_text_from_pdf
+            self._texts[name] = extract_text_from_pdf(io.BytesIO(self.corpus[name]))
+        return self._texts[name]
+
+    def pages(self, name: str) -> int:
+        return self.corpus[name].count(b"/Type /Page ")
+
+    @property
+    def jd(self) -> str:
+        return _read(JD_FILE)
+
+    @property
+    def feedback(self) -> str:
+        return _read(FEEDBACK_FILE)
+
+
+# Each case factory returns (fn, units per call, unit name); fn takes no arguments
+def _extract_text(name):
+    def factory(inp):
+        from utils import extract_text_from_pdf
+        pdf = inp.corpus[name]
+        return (lambda: extract_text_from_pdf(io.BytesIO(pdf))), inp.pages(name), "pages"
+    return factory
+
+
+def _extract_docx(name):
+    def factory(inp):
+        from docx_ingest import extract_text_from_docx
+        data = inp.docx_corpus[name]
+        return (lambda: extract_text_from_docx(io.BytesIO(data))), inp.pages(name), "pages"
+    return factory
+
+
+def _rasterize(dpi, max_dim, name="p2_dense"):
+    def factory(inp):
+        from vision_ocr import pdf_pages_to_base64_images
+        pdf = inp.corpus[name]
+        return (lambda: pdf_pages_to_base64_images(pdf, dpi=dpi, max_dim=max_dim)), inp.pages(name), "pages"
+    return factory
+
+
+def _extract_rewrites(inp):
+    from utils import extract_rewrites
+    feedback = inp.feedback
+    return (lambda: extract_rewrites(feedback)), len(extract_rewrites(feedback)), "rewrites"
+
+
+def _replace_bullets(name):
+    def factory(inp):
+        from utils import extract_rewrites, replace_bullets_whole_text
+        text, rewrites = inp.text(name), extract_rewrites(inp.feedback)
+        return (lambda: replace_bullets_whole_text(text, rewrites)), len(rewrites), "rewrites"
+    return factory
+
+
+def _ats_score(name, cold=False, semantic=False):
+    def factory(inp):
+        from utils import ats_score, jd_index
+        text, jd = inp.text(name), inp.jd
+
+        def fn():
+            if cold:
+                jd_index.cache_clear()   # include building the JD keyword index
+            return ats_score(text, jd, semantic=semantic)
+        return fn, 1, "resumes"
+    return factory
+
+
+CASES = {
+    **{f"extract_text[{name}]": _extract_text(name)
+       for name in ("p1_sparse", "p1_dense", "p2_dense", "p4_dense", "p8_dense")},
+    **{f"extract_docx[{name}]": _extract_docx(name) for name in ("p1_dense", "p8_dense")},
+    **{f"rasterize[dpi={dpi},max_dim={dim}]": _rasterize(dpi, dim) for dpi, dim in RASTER_SETTINGS},
+    "extract_rewrites[backend]": _extract_rewrites,
+    **{f"replace_bullets[{name}]": _replace_bullets(name) for name in ("p1_dense", "p4_dense", "p8_dense")},
+    **{f"ats_score[{name}]": _ats_score(name) for name in ("p1_dense", "p8_dense")},
+    "ats_score_cold_jd[p1_dense]": _ats_score("p1_dense", cold=True),
+    **{f"ats_score_semantic[{name}]": _ats_score(name, semantic=True) for name in ("p1_dense", "p8_dense")},
+    "ats_score_semantic_cold_jd[p1_dense]": _ats_score("p1_dense", cold=True, semantic=True),
+}
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    k = (len(sorted_values) - 1) * q
+    lo, hi = math.floor(k), math.ceil(k)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(name: str, repeat: int, warmup: int) -> dict:
+    """Time one case in the current process."""
+    try:
+        fn, units, unit = CASES[name](Inputs())
+        for _ in range(warmup):
+            fn()
+        # Loop fast calls so timer resolution does not dominate a sample
+        start = time.perf_counter()
+        fn()
+        single = time.perf_counter() - start
+        inner = max(1, math.ceil(MIN_SAMPLE_SECONDS / single)) if single > 0 else 1000
+
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(inner):
+                fn()
+            samples.append((time.perf_counter() - start) / inner)
+    except Exception as exc:
+        return {"skipped": f"{type(exc).__name__}: {exc}"}
+
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    return {
+        "runs": repeat,
+        "calls_per_run": inner,
+        "p50_ms": round(_percentile(samples, 0.50) * 1000, 4),
+        "p95_ms": round(_percentile(samples, 0.95) * 1000, 4),
+        "mean_ms": round(mean * 1000, 4),
+        "throughput": round(units / mean, 2) if mean else None,
+        "unit": f"{unit}/s",
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_child_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def _run_isolated(name: str, repeat: int, warmup: int) -> dict:
+    # A fresh interpreter per case, so peak RSS is not inherited from earlier cases
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_case, (name, repeat, warmup))
+
+
+def _meta(repeat: int, warmup: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "warmup": warmup,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2, rss_slack_mb: float = 5.0) -> list[dict]:
+    """
+    Per-case comparison against a saved run. A case regresses when its p50
+    is more than `tolerance` slower, or its peak RSS grew by more than
+    `tolerance` and `rss_slack_mb`.
+    """
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "skipped" in cur or "skipped" in base:
+            continue
+        ratio = cur["p50_ms"] / base["p50_ms"] if base["p50_ms"] else float("inf")
+        rss_delta = cur["peak_rss_mb"] - base["peak_rss_mb"]
+        slower = ratio > 1 + tolerance
+        fatter = rss_delta > rss_slack_mb and cur["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance)
+        rows.append({
+            "case": name,
+            "baseline_p50_ms": base["p50_ms"],
+            "p50_ms": cur["p50_ms"],
+            "p50_ratio": round(ratio, 3),
+            "rss_delta_mb": round(rss_delta, 1),
+            "regression": slower or fatter,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="timed samples per case")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", default=None, help="regex selecting case names")
+    parser.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="baseline JSON from an earlier --out")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown, e.g. 0.2 = 20%%")
+    parser.add_argument("--no-isolate", action="store_true", help="run all cases in this process (faster, shared RSS)")
+    parser.add_argument("--list", action="store_true", help="list case names and exit")
+    args = parser.parse_args(argv)
+
+    names = [n for n in CASES if not args.only or re.search(args.only, n)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    results = {}
+    for name in names:
+        runner = run_case if args.no_isolate else _run_isolated
+        results[name] = runner(name, args.repeat, args.warmup)
+        res = results[name]
+        summary = res.get("skipped") or (
+            f"p50 {res['p50_ms']:.3f} ms  p95 {res['p95_ms']:.3f} ms  "
+            f"{res['throughput']} {res['unit']}  rss {res['peak_rss_mb']} MB"
+        )
+        print(f"{name:40s} {summary}", file=sys.stderr)
+
+    report = {"meta": _meta(args.repeat, args.warmup), "results": results}
+    status = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        report["baseline"] = baseline.get("meta")
+        report["comparison"] = compare(report, baseline, args.tolerance)
+        regressions = [row for row in report["comparison"] if row["regression"]]
+        for row in regressions:
+            print(f"REGRESSION {row['case']}: p50 {row['baseline_p50_ms']} -> {row['p50_ms']} ms "
+                  f"(x{row['p50_ratio']}), rss {row['rss_delta_mb']:+} MB", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Deterministic synthetic resume PDFs for the benchmark suite.
+
+Writes minimal single-font PDFs directly (no reportlab), so the corpus is
+rebuilt identically on any machine from a seed. Resumes vary by page count
+and bullet density; bullets are long enough to wrap onto continuation
+lines, which exercises the bullet-merging path in iter_resume_lines.
+
+    python -m benchmarks.synthetic --out corpus/     # write the corpus for batch.py
+"""
+import argparse
+import io
+import os
+import random
+import textwrap
+
+# Bullet pool shared with benchmarks/data/feedback_*.md, whose Before lines quote these
+BULLETS = [
+    "Built data pipelines in Python and SQL processing 10M rows daily for the analytics team",
+    "Led a team of 4 engineers to migrate services to Kubernetes on AWS",
+    "Improved API latency by 30% by adding Redis caching and query batching",
+    "Designed REST APIs used by 12 internal teams and 3 external partners",
+    "Automated CI/CD with GitHub Actions and Terraform, cutting release time from days to hours",
+    "Worked on the frontend in React and TypeScript",
+    "Responsible for monitoring and on-call for production systems",
+    "Wrote unit and integration tests raising coverage from 40% to 85%",
+    "Mentored 3 junior developers through code reviews and pairing",
+    "Helped with database schema design and PostgreSQL performance tuning",
+    "Created dashboards in Grafana to track service health and error budgets",
+    "Collaborated with product managers to scope features and estimate delivery",
+    "Refactored a legacy Java monolith into Go microservices",
+    "Reduced cloud spend by 18% through rightsizing and spot instances",
+    "Participated in agile ceremonies and sprint planning",
+    "Implemented OAuth2 login and role-based access control",
+]
+
+SECTIONS = ["WORK EXPERIENCE", "PROJECTS", "EDUCATION", "SKILLS"]
+SKILLS = "Python, SQL, Go, Java, React, TypeScript, Kubernetes, Docker, AWS, Terraform, PostgreSQL, Redis"
+
+LINES_PER_PAGE = 50
+WRAP = 78
+
+# (name, pages, bullets per job) -- the corpus the benchmarks run over
+CORPUS = [
+    ("p1_sparse", 1, 3),
+    ("p1_dense", 1, 6),
+    ("p2_dense", 2, 6),
+    ("p4_dense", 4, 6),
+    ("p8_dense", 8, 6),
+]
+
+
+def resume_lines(n_pages: int, bullets_per_job: int, seed: int = 0) -> list[str]:
+    """Plain-text resume lines sized to fill roughly `n_pages` pages."""
+    rng = random.Random(seed)
+    lines = ["JANE DOE", "Senior Software Engineer", "", "WORK EXPERIENCE"]
+    job = 0
+    while len(lines) < n_pages * LINES_PER_PAGE - 12:
+        job += 1
+        lines += ["", f"Software Engineer, Company {job} ({2024 - job} - {2025 - job})"]
+        for bullet in rng.sample(BULLETS, bullets_per_job):
+            wrapped = textwrap.wrap(f"- {bullet}", WRAP, subsequent_indent="  ")
+            lines += wrapped
+    lines += ["", "EDUCATION", "BS Computer Science, State University", "", "SKILLS", SKILLS]
+    return lines
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode("cp1252", "replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def make_pdf(lines: list[str], lines_per_page: int = LINES_PER_PAGE) -> bytes:
+    """A minimal PDF with Helvetica text, `lines_per_page` lines per page."""
+    objs: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objs.append(body)
+        return len(objs)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_obj = add(b"")
+    page_ids = []
+    for start in range(0, max(1, len(lines)), lines_per_page):
+        ops = [b"BT /F1 10 Tf 50 760 Td 14 TL"]
+        for ln in lines[start:start + lines_per_page]:
+            ops.append(b"(" + _escape(ln) + b") Tj T*")
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 612 792] /Contents {content} 0 R "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> >>".encode()
+        ))
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objs[pages_obj - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+    catalog = add(f"<< /Type /Catalog /Pages {pages_obj} 0 R >>".encode())
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def make_docx(lines: list[str]) -> bytes:
+    """
+    The same resume as a Word document: wrapped bullets become one "List
+    Bullet" paragraph, all-caps lines become headings. Needs python-docx.
+    """
+    import docx
+
+    document = docx.Document()
+    for ln in lines:
+        if ln.startswith("  ") and document.paragraphs:
+            document.paragraphs[-1].add_run(" " + ln.strip())
+        elif ln.startswith("- "):
+            document.add_paragraph(ln[2:], style="List Bullet")
+        elif ln in SECTIONS:
+            document.add_heading(ln.title(), level=1)
+        else:
+            document.add_paragraph(ln)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def build_corpus(seed: int = 0) -> dict[str, bytes]:
+    """{name: pdf_bytes} for every CORPUS entry."""
+    return {
+        name: make_pdf(resume_lines(pages, density, seed=seed + i))
+        for i, (name, pages, density) in enumerate(CORPUS)
+    }
+
+
+def build_docx_corpus(seed: int = 0) -> dict[str, bytes]:
+    """{name: docx_bytes} with the same resumes as build_corpus."""
+    return {
+        name: make_docx(resume_lines(pages, density, seed=seed + i))
+        for i, (name, pages, density) in enumerate(CORPUS)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="directory to write the PDFs into")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+    for name, data in build_corpus(args.seed).items():
+        with open(os.path.join(args.out, f"{name}.pdf"), "wb") as fh:
+            fh.write(data)
+    print(f"Wrote {len(CORPUS)} PDFs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
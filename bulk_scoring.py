@@ -0,0 +1,104 @@
+"""
+Vectorized ATS scoring for ranking many resumes against one job description.
+
+Each resume is scanned once into a shared feature representation (keyword
+and verb hit matrices, number/bullet/word counts, section flags); the five
+sub-scores of utils.ats_score are then computed as NumPy array operations
+over the whole pool. Totals match ats_score resume for resume.
+"""
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from utils import (
+    ACTION_VERB_RE, ACTION_VERBS, NUMBER_RE, SECTIONS_NEEDED, JobDescriptionIndex, count_bullets, jd_index,
+)
+
+COMPONENTS = ("keyword", "section", "impact", "verb", "length")
+VERBS = tuple(sorted(ACTION_VERBS))
+
+
+class ResumeFeatures(NamedTuple):
+    keyword_hits: np.ndarray    # (n, k) bool term-document matrix over JD keywords
+    verb_hits: np.ndarray       # (n, len(VERBS)) bool
+    section_hits: np.ndarray    # (n, len(SECTIONS_NEEDED)) bool
+    numbers: np.ndarray         # (n,) numeric tokens
+    bullets: np.ndarray         # (n,) lines starting with a bullet (utils.count_bullets)
+    words: np.ndarray           # (n,) whitespace-separated words
+
+
+class BulkScores(NamedTuple):
+    total: np.ndarray           # (n,) int, same as ats_score
+    breakdown: np.ndarray       # (n, len(COMPONENTS)) float
+    features: ResumeFeatures
+
+
+def resume_features(resumes: Sequence[str], index: JobDescriptionIndex) -> ResumeFeatures:
+    """Scan every resume once and collect the features all five scorers need."""
+    n = len(resumes)
+    kw_col = {kw: j for j, kw in enumerate(index.lowered)}
+    verb_col = {v: j for j, v in enumerate(VERBS)}
+
+    keyword_hits = np.zeros((n, len(index.lowered)), dtype=bool)
+    verb_hits = np.zeros((n, len(VERBS)), dtype=bool)
+    section_hits = np.zeros((n, len(SECTIONS_NEEDED)), dtype=bool)
+    numbers = np.zeros(n, dtype=np.int64)
+    bullets = np.zeros(n, dtype=np.int64)
+    words = np.zeros(n, dtype=np.int64)
+
+    for i, text in enumerate(resumes):
+        lower = text.lower()
+        for kw in index.keyword_hits(lower):
+            keyword_hits[i, kw_col[kw]] = True
+        for v in set(ACTION_VERB_RE.findall(lower)):
+            verb_hits[i, verb_col[v]] = True
+        section_hits[i] = [s in lower for s in SECTIONS_NEEDED]
+        numbers[i] = len(NUMBER_RE.findall(text))
+        bullets[i] = count_bullets(text)
+        words[i] = len(text.split())
+    # Duplicate keyword columns (same lowercase keyword) must each count
+    for j, kw in enumerate(index.lowered):
+        keyword_hits[:, j] = keyword_hits[:, kw_col[kw]]
+
+    return ResumeFeatures(keyword_hits, verb_hits, section_hits, numbers, bullets, words)
+
+
+def score_features(features: ResumeFeatures, n_keywords: int) -> np.ndarray:
+    """(n, 5) sub-score matrix, column order COMPONENTS, using ats_score's weights."""
+    keyword = 50 * features.keyword_hits.sum(axis=1) / (n_keywords or 1)
+    section = 15 * features.section_hits.sum(axis=1) / len(SECTIONS_NEEDED)
+    impact = 15 * np.minimum(1, features.numbers / np.maximum(1, features.bullets))
+    verb = 10 * np.minimum(1, features.verb_hits.sum(axis=1) / 15)
+
+    w = features.words
+    length = np.select(
+        [(w >= 250) & (w <= 900), w < 150, w > 1200],
+        [10, 10 * 0.3, 10 * 0.3],
+        default=10 * 0.6,
+    )
+    return np.column_stack([keyword, section, impact, verb, length]).astype(float)
+
+
+def ats_score_many(resumes: Sequence[str], jd_txt="") -> BulkScores:
+    """
+    Score every resume against one JD.
+
+    `jd_txt` may be a raw job description or a prebuilt JobDescriptionIndex.
+    Returns totals (rounded like ats_score), the per-component breakdown and
+    the underlying feature matrices.
+    """
+    index = jd_txt if isinstance(jd_txt, JobDescriptionIndex) else jd_index(jd_txt)
+    features = resume_features(resumes, index)
+    breakdown = score_features(features, len(index.keywords))
+    # Same left-to-right sum and half-to-even rounding as ats_score
+    total = breakdown[:, 0]
+    for col in range(1, breakdown.shape[1]):
+        total = total + breakdown[:, col]
+    return BulkScores(np.round(total).astype(int), breakdown, features)
+
+
+def rank_resumes(resumes: Sequence[str], jd_txt="", top: int | None = None):
+    """Indices of `resumes` from best to worst ATS score (stable on ties)."""
+    scores = ats_score_many(resumes, jd_txt).total
+    order = np.argsort(-scores, kind="stable")
+    return order[:top] if top else order
@@ -0,0 +1,194 @@
+import base64
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import metrics
+from docx_ingest import docx_text_quality, docx_to_pdf, is_docx
+from resume_document import ResumeDocument
+from uploads import Source, open_source, source_digest
+from text_layer import analyze_text_layer
+from vision_ocr import PayloadPolicy, pdf_pages_to_payload
+
+# In-memory budget for cached text + page images (bytes); disk tier is opt-in
+DEFAULT_MAX_BYTES = int(os.environ.get("RESUME_CACHE_MAX_MB", "64")) * 1024 * 1024
+DEFAULT_DISK_DIR = os.environ.get("RESUME_CACHE_DIR") or None
+
+
+def pdf_digest(pdf_bytes: Source) -> str:
+    """Content hash used as the cache key for everything derived from an upload (PDF or DOCX)."""
+    return source_digest(pdf_bytes)
+
+
+def _approx_size(value) -> int:
+    """
+    Rough bytes held by a cached value (text, line records, content blocks,
+    payload dicts). Walks the structure and adds up string lengths, so an
+    image payload is measured by its data URLs instead of being serialized
+    into one more copy.
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k)) + _approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_approx_size(v) for v in value) + len(value)
+    return 8
+
+
+class PdfCache:
+    """
+    Size-bounded LRU keyed by PDF content hash, with an optional on-disk tier.
+
+    Values must be JSON-serialisable (merged text, image content blocks).
+    A memory miss falls through to disk; a disk hit is promoted back to memory.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, disk_dir: str | None = DEFAULT_DISK_DIR):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: collections.OrderedDict[str, tuple[object, int]] = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.disk_dir, name[:2], f"{name}.json")
+
+    def _remember(self, key: str, value) -> None:
+        size = _approx_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.count("cache_requests_total", cache="pdf", tier="memory", result="hit")
+                return entry[0]
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "r", encoding="utf-8") as fh:
+                    value = json.load(fh)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                self._remember(key, value)
+                with self._lock:
+                    self.hits += 1
+                metrics.count("cache_requests_total", cache="pdf", tier="disk", result="hit")
+                return value
+
+        with self._lock:
+            self.misses += 1
+        metrics.count("cache_requests_total", cache="pdf", tier="any", result="miss")
+        return None
+
+    def put(self, key: str, value) -> None:
+        self._remember(key, value)
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(value, fh)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def get_or_compute(self, key: str, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+# Process-wide cache shared by every Streamlit session
+pdf_cache = PdfCache()
+
+
+def cached_resume_document(pdf_bytes: Source, cache: PdfCache = pdf_cache) -> ResumeDocument:
+    """
+    A fresh ResumeDocument for `pdf_bytes`, parsed at most once (pdfplumber,
+    or python-docx when the upload is a Word document).
+
+    The cache holds the line records; each call builds its own document, so
+    callers may edit it without affecting other sessions.
+    """
+    key = f"lines:{pdf_digest(pdf_bytes)}"
+    build = ResumeDocument.from_docx if is_docx(pdf_bytes) else ResumeDocument.from_pdf
+
+    def compute():
+        with open_source(pdf_bytes) as fh:
+            return build(fh).to_records()
+
+    records = cache.get_or_compute(key, compute)
+    return ResumeDocument.from_records(records)
+
+
+def cached_rendered_pdf(data: Source, cache: PdfCache = pdf_cache) -> Source:
+    """`data` itself for a PDF; a Word document is converted to PDF at most once."""
+    if not is_docx(data):
+        return data
+    key = f"pdf:{pdf_digest(data)}"
+    encoded = cache.get_or_compute(key, lambda: base64.b64encode(docx_to_pdf(data)).decode("ascii"))
+    return base64.b64decode(encoded)
+
+
+def cached_text_quality(pdf_bytes: Source, cache: PdfCache = pdf_cache) -> list[dict]:
+    """Per-page text-layer quality for `pdf_bytes` (see text_layer.analyze_text_layer)."""
+    key = f"quality:{pdf_digest(pdf_bytes)}"
+    analyze = docx_text_quality if is_docx(pdf_bytes) else analyze_text_layer
+    return cache.get_or_compute(key, lambda: analyze(pdf_bytes))
+
+
+def cached_page_payload(pdf_bytes: Source, policy: PayloadPolicy | None = None, pages=None,
+                        cache: PdfCache = pdf_cache):
+    """
+    {"blocks": [...], "report": [...]} for `pdf_bytes` under `policy`, encoded at most once.
+
+    Page numbers of a Word document are only estimates, so any image request
+    for one renders every page of the converted PDF.
+    """
+    policy = policy or PayloadPolicy()
+    if is_docx(pdf_bytes):
+        pages = None
+    page_key = ",".join(map(str, sorted(pages))) if pages is not None else "all"
+    key = f"payload:{pdf_digest(pdf_bytes)}:{page_key}:{policy!r}"
+
+    def compute():
+        blocks, report = pdf_pages_to_payload(cached_rendered_pdf(pdf_bytes, cache), policy, pages=pages)
+        return {"blocks": blocks, "report": report}
+
+    return cache.get_or_compute(key, compute)
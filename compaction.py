@@ -0,0 +1,197 @@
+"""
+Prompt compaction: trim the resume and job description before get_roast_prompt.
+
+Prompt tokens drive both latency and cost per review, so this stage
+removes what the model does not need (JD boilerplate, EEO statements,
+benefits, duplicate lines, contact details) and, under a token budget,
+drops the lowest-priority resume sections first so Work Experience bullets
+survive intact. Bullets are never reworded, only whitespace-collapsed, so
+the model can still quote them exactly for the Before/After pairs.
+"""
+import functools
+import re
+from dataclasses import dataclass
+
+from utils import BULLET_RE, is_heading
+
+# JD sections dropped wholesale, matched against their heading line
+JD_DROP_HEADING_RE = re.compile(
+    r"(benefit|perks|what we offer|compensation|salary|equal (employment )?opportunit|eeo|"
+    r"diversity|accommodation|about (us|the company)|who we are|privacy|how to apply)",
+    re.I,
+)
+# Headings that start a section worth keeping (end a dropped section)
+JD_KEEP_HEADING_RE = re.compile(
+    r"(responsibilit|requirement|qualification|what you|you will|you'll|about the (role|job|team)|"
+    r"skills|experience|nice to have|preferred|the role|duties)",
+    re.I,
+)
+# Individual boilerplate sentences that show up outside any heading
+JD_BOILERPLATE_RE = re.compile(
+    r"(equal opportunity employer|affirmative action|without regard to|regardless of (race|age|gender)|"
+    r"protected veteran|reasonable accommodation|e-?verify|401\(?k\)?|paid time off|"
+    r"health, dental|medical, dental|apply now|click apply)",
+    re.I,
+)
+CONTACT_RE = re.compile(
+    r"([\w.+-]+@[\w-]+\.[\w.]+|https?://\S+|www\.\S+|linkedin\.com\S*|github\.com\S*|"
+    r"(?:\+?\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4})",
+    re.I,
+)
+
+# Lower number = kept longer when trimming to the budget
+SECTION_PRIORITY = (
+    (re.compile(r"experience|employment|work history", re.I), 0),
+    (re.compile(r"skill|summary|objective|profile", re.I), 1),
+    (re.compile(r"project", re.I), 2),
+    (re.compile(r"education", re.I), 3),
+)
+OTHER_SECTION_PRIORITY = 4
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # not installed, or encoding files unavailable offline
+        return None
+
+
+def tokenizer_name() -> str:
+    return "o200k_base" if _encoding() is not None else "approx-4-chars"
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken's o200k_base when available, else ~4 characters per token."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, round(len(text) / 4))
+
+
+@dataclass(frozen=True)
+class CompactionPolicy:
+    token_budget: int | None = None   # resume + JD tokens; None only cleans up
+    jd_share: float = 0.35            # part of the budget the JD may use
+    drop_contact: bool = True
+    drop_duplicates: bool = True
+
+
+def _collapse(line: str) -> str:
+    return " ".join(line.split())
+
+
+def compact_job_description(jd: str, policy: CompactionPolicy = CompactionPolicy()) -> str:
+    lines, seen = [], set()
+    dropping = False
+    for raw in jd.splitlines():
+        line = _collapse(raw)
+        if not line:
+            continue
+        # Only a short line set off as a heading (trailing colon or all caps) opens a section;
+        # a requirement such as "Experience with privacy frameworks" must not
+        heading = len(line.split()) <= 8 and (line.endswith(":") or line.isupper())
+        if heading:
+            # A keep pattern wins, and both must start the heading, not appear anywhere in it
+            dropping = not JD_KEEP_HEADING_RE.match(line) and bool(JD_DROP_HEADING_RE.match(line))
+        if dropping or JD_BOILERPLATE_RE.search(line):
+            continue
+        key = line.lower()
+        if policy.drop_duplicates and key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _section_priority(heading: str) -> int:
+    for pattern, priority in SECTION_PRIORITY:
+        if pattern.search(heading):
+            return priority
+    return OTHER_SECTION_PRIORITY
+
+
+def _resume_sections(resume_text: str, policy: CompactionPolicy):
+    """[(priority, [lines])] in document order, cleaned line by line."""
+    sections = [(1, [])]    # header block (name, title) is kept early
+    seen = set()
+    for raw in resume_text.splitlines():
+        line = _collapse(raw)
+        if not line:
+            continue
+        is_bullet = bool(BULLET_RE.match(line))
+        if policy.drop_contact and not is_bullet and CONTACT_RE.search(line):
+            line = _collapse(CONTACT_RE.sub(" ", line)).strip(" |,;·")
+            if len(line) <= 2:
+                continue
+        key = line.lower()
+        if policy.drop_duplicates and key in seen:
+            continue
+        seen.add(key)
+        if not is_bullet and is_heading(line):
+            sections.append((_section_priority(line), [line]))
+        else:
+            sections[-1][1].append(line)
+    return sections
+
+
+def compact_resume(resume_text: str, token_budget: int | None = None,
+                   policy: CompactionPolicy = CompactionPolicy()) -> str:
+    sections = _resume_sections(resume_text, policy)
+    text = "\n".join(ln for _, lines in sections for ln in lines)
+    if token_budget is None or count_tokens(text) <= token_budget:
+        return text
+
+    # Drop whole lines from the end of the least important sections first
+    kept = [list(lines) for _, lines in sections]
+    line_tokens = {ln: count_tokens(ln) + 1 for lines in kept for ln in lines}   # +1 for the newline
+    total = sum(line_tokens[ln] for lines in kept for ln in lines)
+    order = sorted(range(len(sections)), key=lambda i: (-sections[i][0], -i))
+    for i in order:
+        if sections[i][0] == 0:
+            break               # never trim Work Experience
+        while kept[i] and total > token_budget:
+            total -= line_tokens[kept[i].pop()]
+        if total <= token_budget:
+            break
+    # A section trimmed down to its bare heading goes too
+    for i, (_, lines) in enumerate(sections):
+        if len(kept[i]) == 1 and len(lines) > 1:
+            kept[i] = []
+    return "\n".join(ln for lines in kept for ln in lines)
+
+
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    lines = text.splitlines()
+    while lines and count_tokens("\n".join(lines)) > budget:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def compact_prompt_inputs(resume_text: str, job_description: str,
+                          policy: CompactionPolicy = CompactionPolicy()):
+    """
+    Return (resume, job_description, report) ready for get_roast_prompt.
+
+    report holds before/after token counts for both inputs and the
+    tokenizer used, so the stage can be measured and tuned.
+    """
+    jd = compact_job_description(job_description or "", policy)
+    jd_budget = resume_budget = None
+    if policy.token_budget is not None:
+        jd_budget = int(policy.token_budget * policy.jd_share)
+        jd = _truncate_to_tokens(jd, jd_budget)
+        resume_budget = policy.token_budget - count_tokens(jd)
+    resume = compact_resume(resume_text or "", resume_budget, policy)
+
+    report = {
+        "tokenizer": tokenizer_name(),
+        "resume_tokens_before": count_tokens(resume_text or ""),
+        "resume_tokens_after": count_tokens(resume),
+        "jd_tokens_before": count_tokens(job_description or ""),
+        "jd_tokens_after": count_tokens(jd),
+    }
+    return resume, jd, report
@@ -0,0 +1,322 @@
+"""
+Word (.docx) resumes read straight from python-docx.
+
+The paragraphs, list numbering and heading styles in a DOCX already carry
+the structure that iter_resume_lines recovers from a PDF by merging
+wrapped lines, so a Word upload goes to the same ResumeLine records with
+no PDF parsing or rasterization. List items become one "• " or "1. "
+line each, Heading/Title styles are headings (other lines fall back to
+utils.is_heading), and layout tables are read cell by cell in document
+order.
+
+A DOCX has no fixed pages. Page numbers come from the page breaks Word
+records when it saves (explicit and last-rendered), so they are an
+estimate. Page images are needed only when the vision route asks for
+them; docx_to_pdf then converts the file once (LibreOffice, docx2pdf or
+pypandoc, whichever is available) and the PDF path takes over.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from typing import Iterator
+
+import metrics
+from text_layer import MIN_CHARS_PER_PAGE
+from uploads import Source, copy_to, open_source, read_head
+from utils import ResumeLine, is_heading
+
+logger = logging.getLogger(__name__)
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+CONVERT_TIMEOUT = 120      # seconds for one DOCX -> PDF conversion
+_LETTER_PTS = (612.0, 792.0)
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def is_docx(data: Source) -> bool:
+    """True for a Word document (a zip holding word/document.xml); only the zip directory is read."""
+    if read_head(data, 4) != b"PK\x03\x04":
+        return False
+    try:
+        with open_source(data) as fh, zipfile.ZipFile(fh) as zf:
+            return "word/document.xml" in zf.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+class _Numbering:
+    """Bullet vs numbered formats from numbering.xml, and running counters for numbered lists."""
+
+    def __init__(self, document):
+        self._formats: dict[tuple[str, int], str] = {}
+        self._counters: dict[tuple[str, int], int] = {}
+        try:
+            root = document.part.numbering_part.element
+        except (KeyError, NotImplementedError):
+            return
+        abstract = {}
+        for an in root.findall(f"{_W}abstractNum"):
+            levels = {}
+            for lvl in an.findall(f"{_W}lvl"):
+                fmt = lvl.find(f"{_W}numFmt")
+                levels[int(lvl.get(f"{_W}ilvl", "0"))] = fmt.get(f"{_W}val") if fmt is not None else "bullet"
+            abstract[an.get(f"{_W}abstractNumId")] = levels
+        for num in root.findall(f"{_W}num"):
+            ref = num.find(f"{_W}abstractNumId")
+            if ref is not None:
+                for ilvl, fmt in abstract.get(ref.get(f"{_W}val"), {}).items():
+                    self._formats[(num.get(f"{_W}numId"), ilvl)] = fmt
+
+    def prefix(self, num_id: str, ilvl: int) -> str:
+        fmt = self._formats.get((num_id, ilvl), "bullet")
+        if fmt in ("bullet", "none"):
+            return "• "
+        key = (num_id, ilvl)
+        self._counters[key] = self._counters.get(key, 0) + 1
+        # A deeper level restarts when its parent advances
+        for other in [k for k in self._counters if k[0] == num_id and k[1] > ilvl]:
+            del self._counters[other]
+        return f"{self._counters[key]}. "
+
+
+def _num_pr_of(p_pr):
+    num_pr = p_pr.find(f"{_W}numPr") if p_pr is not None else None
+    if num_pr is None:
+        return None
+    num_id, ilvl = num_pr.find(f"{_W}numId"), num_pr.find(f"{_W}ilvl")
+    return (
+        num_id.get(f"{_W}val") if num_id is not None else None,
+        int(ilvl.get(f"{_W}val", "0")) if ilvl is not None else 0,
+    )
+
+
+class _Styles:
+    """
+    Paragraph style names and list numbering, read once from styles.xml.
+    python-docx's Paragraph.style rescans the style part on every call,
+    which costs more than reading the whole document.
+    """
+
+    def __init__(self, document):
+        self._styles: dict[str, tuple[str, tuple | None, str | None]] = {}
+        self.default_id = None
+        for st in document.styles.element.findall(f"{_W}style"):
+            if st.get(f"{_W}type") != "paragraph":
+                continue
+            style_id = st.get(f"{_W}styleId")
+            name, based_on = st.find(f"{_W}name"), st.find(f"{_W}basedOn")
+            self._styles[style_id] = (
+                name.get(f"{_W}val", "") if name is not None else "",
+                _num_pr_of(st.find(f"{_W}pPr")),
+                based_on.get(f"{_W}val") if based_on is not None else None,
+            )
+            if st.get(f"{_W}default") in ("1", "true"):
+                self.default_id = style_id
+
+    def _style_id(self, paragraph) -> str | None:
+        return paragraph._p.style or self.default_id
+
+    def is_heading(self, paragraph) -> bool:
+        # Built-in names are stored lowercase in the XML ("heading 1", "Title")
+        name = self._styles.get(self._style_id(paragraph), ("",))[0].lower()
+        return name == "title" or name.startswith("heading")
+
+    def num_pr(self, paragraph):
+        """(numId, ilvl) from the paragraph or its style chain, or None when it is not a list item."""
+        num = _num_pr_of(paragraph._p.pPr)
+        style_id, seen = self._style_id(paragraph), set()
+        while (num is None or num[0] is None) and style_id in self._styles and style_id not in seen:
+            seen.add(style_id)
+            _, style_num, style_id = self._styles[style_id]
+            if style_num is not None:
+                # A paragraph-level ilvl overrides the style's, the numId comes from the style
+                num = (style_num[0], num[1] if num is not None else style_num[1])
+        if num is None or num[0] in (None, "0"):     # "0": numbering explicitly removed
+            return None
+        return num
+
+
+def _page_breaks(paragraph) -> int:
+    # One tag-filtered walk; xpath per paragraph is the slowest part of reading a document
+    hard = rendered = 0
+    for el in paragraph._p.iter(f"{_W}br", f"{_W}lastRenderedPageBreak"):
+        if el.tag == f"{_W}lastRenderedPageBreak":
+            rendered += 1
+        elif el.get(f"{_W}type") == "page":
+            hard += 1
+    return max(hard, rendered)
+
+
+def _iter_paragraphs(container):
+    """Paragraphs in reading order, descending into table cells (merged cells once)."""
+    from docx.table import Table
+
+    for block in container.iter_inner_content():
+        if isinstance(block, Table):
+            for row in block.rows:
+                seen = set()
+                for cell in row.cells:
+                    if id(cell._tc) in seen:
+                        continue
+                    seen.add(id(cell._tc))
+                    yield from _iter_paragraphs(cell)
+        else:
+            yield block
+
+
+def _open(file_obj):
+    import docx   # python-docx; only needed once a Word file is actually read
+
+    try:
+        file_obj.seek(0)
+    except Exception:
+        pass
+    return docx.Document(file_obj)
+
+
+def _iter_located(document):
+    """(paragraph, page) in reading order, starting with the first page header."""
+    # Contact details often live in the page header; a PDF export puts them on top of the page
+    header = document.sections[0].header if document.sections else None
+    if header is not None and not header.is_linked_to_previous:
+        for paragraph in header.paragraphs:
+            yield paragraph, 1
+    page = 1
+    for paragraph in _iter_paragraphs(document):
+        page += _page_breaks(paragraph)
+        yield paragraph, page
+
+
+def _paragraph_lines(paragraph, page: int, numbering: _Numbering, styles: _Styles) -> Iterator[ResumeLine]:
+    text = paragraph.text.replace("\t", " ").replace("\xa0", " ")
+    if not text.strip():
+        yield ResumeLine("", page, False, False)
+        return
+
+    num = styles.num_pr(paragraph)
+    if num is not None:
+        content = " ".join(part.strip() for part in text.splitlines() if part.strip())
+        yield ResumeLine(numbering.prefix(*num) + content, page, True, False)
+        return
+
+    styled_heading = styles.is_heading(paragraph)
+    for ln in text.splitlines():
+        if not ln.strip():
+            yield ResumeLine("", page, False, False)
+            continue
+        yield ResumeLine(ln.strip(), page, False, styled_heading or is_heading(ln))
+
+
+def iter_docx_lines(file_obj) -> Iterator[ResumeLine]:
+    """
+    Yield merged resume lines from a .docx, the same records iter_resume_lines
+    yields for a PDF: one line per paragraph (soft line breaks split it,
+    except inside list items), blank paragraphs as "".
+    """
+    document = _open(file_obj)
+    numbering, styles = _Numbering(document), _Styles(document)
+    for paragraph, page in _iter_located(document):
+        yield from _paragraph_lines(paragraph, page, numbering, styles)
+
+
+def extract_text_from_docx(file_obj) -> str:
+    """Merged resume text from a .docx, as extract_text_from_pdf returns for a PDF."""
+    with metrics.span("extract_text", format="docx") as sp:
+        text = "\n".join(line.text for line in iter_docx_lines(file_obj))
+        sp["chars"] = len(text)
+    return text
+
+
+def docx_text_quality(docx_bytes: Source) -> list[dict]:
+    """
+    Per-page records shaped like text_layer.analyze_text_layer. The text is
+    native, so a page is only marked bad when it holds pictures and almost
+    no text (e.g. a scanned resume pasted in), which sends it to the vision
+    route; a short page of plain text stays good.
+    """
+    with open_source(docx_bytes) as fh:
+        document = _open(fh)
+    section = document.sections[0] if document.sections else None
+    width, height = _LETTER_PTS
+    if section is not None and section.page_width and section.page_height:
+        width, height = section.page_width.pt, section.page_height.pt
+
+    numbering, styles = _Numbering(document), _Styles(document)
+    chars: dict[int, int] = {1: 0}
+    pictures: dict[int, int] = {}
+    for paragraph, page in _iter_located(document):
+        chars[page] = chars.get(page, 0) + sum(
+            len(ln.text) for ln in _paragraph_lines(paragraph, page, numbering, styles)
+        )
+        drawn = sum(1 for _ in paragraph._p.iter(f"{_W}drawing", f"{_W}pict"))
+        if drawn:
+            pictures[page] = pictures.get(page, 0) + drawn
+
+    pages = []
+    for page_no, n in sorted(chars.items()):
+        scanned = pictures.get(page_no, 0) > 0 and n < MIN_CHARS_PER_PAGE
+        pages.append({
+            "page": page_no,
+            "chars": n,
+            "glyph_coverage": 1.0 if n else 0.0,
+            "garbage_ratio": 0.0,
+            "image_ratio": 1.0 if scanned else 0.0,
+            "width_pts": width,
+            "height_pts": height,
+            "good": not scanned,
+        })
+    return pages
+
+
+def _convert_libreoffice(src: str, out_dir: str) -> str:
+    binary = shutil.which("soffice") or shutil.which("libreoffice")
+    if binary is None:
+        raise RuntimeError("LibreOffice (soffice) not on PATH")
+    subprocess.run(
+        [binary, "--headless", "--convert-to", "pdf", "--outdir", out_dir, src],
+        check=True, capture_output=True, timeout=CONVERT_TIMEOUT,
+    )
+    return os.path.join(out_dir, os.path.splitext(os.path.basename(src))[0] + ".pdf")
+
+
+def _convert_docx2pdf(src: str, out_dir: str) -> str:
+    from docx2pdf import convert   # drives Microsoft Word; Windows/macOS only
+
+    out = os.path.join(out_dir, "resume.pdf")
+    convert(src, out)
+    return out
+
+
+def _convert_pypandoc(src: str, out_dir: str) -> str:
+    import pypandoc   # needs pandoc and a PDF engine; loses most of the visual layout
+
+    out = os.path.join(out_dir, "resume.pdf")
+    pypandoc.convert_file(src, "pdf", outputfile=out)
+    return out
+
+
+CONVERTERS = (("libreoffice", _convert_libreoffice), ("docx2pdf", _convert_docx2pdf),
+              ("pypandoc", _convert_pypandoc))
+
+
+def docx_to_pdf(docx_bytes: Source) -> bytes:
+    """Render a .docx to PDF bytes with the first converter that works; RuntimeError if none does."""
+    errors = []
+    with metrics.span("docx_to_pdf", bytes=len(docx_bytes)) as sp, tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "resume.docx")
+        copy_to(docx_bytes, src)
+        for name, convert in CONVERTERS:
+            try:
+                out = convert(src, tmp)
+                with open(out, "rb") as fh:
+                    pdf_bytes = fh.read()
+            except Exception as exc:
+                errors.append(f"{name}: {type(exc).__name__}: {exc}")
+                continue
+            sp["converter"] = name
+            return pdf_bytes
+    raise RuntimeError("Could not render the Word document to page images (" + "; ".join(errors) + ")")
@@ -0,0 +1,221 @@
+"""
+Job catalog: rank one resume against thousands of stored job postings.
+
+Postings are ingested into an inverted index over the same unigrams and
+bigrams top_keywords ranks, weighted by TF-IDF and L2-normalized per
+posting. The index is stored as flat NumPy arrays in CSR layout (per-term
+slices of posting ids and weights) and memory-mapped on load, so opening
+a large catalog costs almost nothing and a query touches only the
+postings of the resume's own terms. Only the top-k postings by cosine
+similarity get a full ats_score breakdown, using each posting's keyword
+list ranked once at build time.
+
+    python job_catalog.py build postings.jsonl --out catalog/
+    python job_catalog.py query resume.pdf --catalog catalog/ -k 10
+
+postings.jsonl holds one {"id", "title", "text"} object per line. The
+catalog is rebuilt as a whole; there is no in-place update.
+"""
+import argparse
+import collections
+import json
+import math
+import os
+import sys
+import time
+from typing import Iterable
+
+import numpy as np
+
+import metrics
+from utils import (
+    JobDescriptionIndex, impact_score, keyword_tokens, length_score, section_score, verb_score,
+)
+
+FORMAT_VERSION = 1
+KEYWORDS_PER_POSTING = 20     # same k as jd_index, so breakdowns match ats_score
+
+
+def index_terms(text: str) -> collections.Counter:
+    """Unigram and bigram counts over keyword_tokens, skipping purely numeric terms."""
+    tokens = keyword_tokens(text)
+    terms = collections.Counter(t for t in tokens if not t.isdigit())
+    terms.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]) if not (a.isdigit() and b.isdigit()))
+    return terms
+
+
+def _tf(count: int) -> float:
+    return 1.0 + math.log(count)
+
+
+def build_catalog(postings: Iterable[dict], path: str) -> dict:
+    """
+    Index `postings` ({"id", "title", "text"}) into directory `path`.
+    Returns {"postings", "terms", "seconds"}.
+    """
+    started = time.perf_counter()
+    meta_postings, doc_terms = [], []
+    df: collections.Counter = collections.Counter()
+    for post in postings:
+        text = post.get("text", "")
+        terms = index_terms(text)
+        doc_terms.append(terms)
+        df.update(terms.keys())
+        meta_postings.append({
+            "id": str(post.get("id", len(meta_postings))),
+            "title": post.get("title", ""),
+            "keywords": JobDescriptionIndex(text, KEYWORDS_PER_POSTING).keywords,
+        })
+
+    n_docs = len(doc_terms)
+    vocab = sorted(df)
+    term_id = {t: i for i, t in enumerate(vocab)}
+    idf = np.array([math.log((1 + n_docs) / (1 + df[t])) + 1.0 for t in vocab], dtype=np.float32)
+
+    # Group weights by term; each posting appears at most once per term
+    by_term: list[list[tuple[int, float]]] = [[] for _ in vocab]
+    for doc, terms in enumerate(doc_terms):
+        weights = {t: _tf(c) * idf[term_id[t]] for t, c in terms.items()}
+        length = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for t, w in weights.items():
+            by_term[term_id[t]].append((doc, w / length))
+
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(p) for p in by_term])
+    doc_ids = np.fromiter((d for p in by_term for d, _ in p), dtype=np.int32, count=int(indptr[-1]))
+    weights = np.fromiter((w for p in by_term for _, w in p), dtype=np.float32, count=int(indptr[-1]))
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "idf.npy"), idf)
+    np.save(os.path.join(path, "indptr.npy"), indptr)
+    np.save(os.path.join(path, "doc_ids.npy"), doc_ids)
+    np.save(os.path.join(path, "weights.npy"), weights)
+    with open(os.path.join(path, "catalog.json"), "w", encoding="utf-8") as fh:
+        json.dump({"version": FORMAT_VERSION, "vocab": vocab, "postings": meta_postings}, fh)
+    return {"postings": n_docs, "terms": len(vocab), "seconds": round(time.perf_counter() - started, 3)}
+
+
+class JobCatalog:
+    """A built catalog opened read-only; the index arrays are memory-mapped."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "catalog.json"), "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported job catalog version {meta.get('version')!r} in {path}")
+        self.postings: list[dict] = meta["postings"]
+        self.term_id = {t: i for i, t in enumerate(meta["vocab"])}
+        self.idf = np.load(os.path.join(path, "idf.npy"), mmap_mode="r")
+        self.indptr = np.load(os.path.join(path, "indptr.npy"), mmap_mode="r")
+        self.doc_ids = np.load(os.path.join(path, "doc_ids.npy"), mmap_mode="r")
+        self.weights = np.load(os.path.join(path, "weights.npy"), mmap_mode="r")
+        self._indexes: dict[tuple[int, bool], JobDescriptionIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    def similarities(self, resume_text: str) -> np.ndarray:
+        """Cosine similarity of the resume to every posting, shape (len(self),)."""
+        scores = np.zeros(len(self.postings), dtype=np.float32)
+        query = {
+            self.term_id[t]: _tf(c) for t, c in index_terms(resume_text).items() if t in self.term_id
+        }
+        if not query:
+            return scores
+        q_weights = {i: w * float(self.idf[i]) for i, w in query.items()}
+        q_norm = math.sqrt(sum(w * w for w in q_weights.values()))
+        for i, w in q_weights.items():
+            lo, hi = self.indptr[i], self.indptr[i + 1]
+            scores[self.doc_ids[lo:hi]] += (w / q_norm) * self.weights[lo:hi]
+        return scores
+
+    def jd_index(self, doc: int, semantic: bool = False) -> JobDescriptionIndex:
+        key = (doc, semantic)
+        if key not in self._indexes:
+            self._indexes[key] = JobDescriptionIndex("", keywords=self.postings[doc]["keywords"], semantic=semantic)
+        return self._indexes[key]
+
+    def search(self, resume_text: str, k: int = 10, semantic: bool = False) -> list[dict]:
+        """
+        Top-k postings by similarity, each with its ats_score breakdown
+        ({"id", "title", "similarity", "ats", "breakdown", "matched_keywords"}).
+        semantic=True counts skill synonyms as keyword hits, as ats_score does.
+        """
+        with metrics.span("catalog_search", postings=len(self.postings)) as sp:
+            scores = self.similarities(resume_text)
+            k = min(k, len(scores))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.lexsort((top, -scores[top]))]
+
+            # The non-keyword components do not depend on the posting
+            shared = {
+                "section": section_score(resume_text),
+                "impact": impact_score(resume_text),
+                "verb": verb_score(resume_text),
+                "length": length_score(resume_text),
+            }
+            resume_lower = resume_text.lower()
+            results = []
+            for doc in top:
+                index = self.jd_index(int(doc), semantic)
+                hits = index.keyword_hits(resume_lower)
+                breakdown = {"keyword": index.keyword_score(resume_text), **shared}
+                total = round(breakdown["keyword"] + breakdown["section"] + breakdown["impact"]
+                              + breakdown["verb"] + breakdown["length"])
+                post = self.postings[int(doc)]
+                results.append({
+                    "id": post["id"],
+                    "title": post["title"],
+                    "similarity": round(float(scores[doc]), 4),
+                    "ats": total,
+                    "breakdown": {name: round(value, 2) for name, value in breakdown.items()},
+                    "matched_keywords": [kw for kw in index.keywords if kw.lower() in hits],
+                })
+            sp["k"] = k
+        return results
+
+
+def _read_postings(path: str):
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index a JSONL file of postings")
+    build.add_argument("postings", help='JSONL with {"id", "title", "text"} per line')
+    build.add_argument("--out", required=True, help="catalog directory")
+    query = sub.add_parser("query", help="rank a resume against a catalog")
+    query.add_argument("resume", help="resume PDF or .txt")
+    query.add_argument("--catalog", required=True)
+    query.add_argument("-k", type=int, default=10)
+    query.add_argument("--semantic", action="store_true", help="count skill synonyms as keyword hits")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(json.dumps(build_catalog(_read_postings(args.postings), args.out)))
+        return
+
+    if args.resume.lower().endswith(".pdf"):
+        from utils import extract_text_from_pdf
+        with open(args.resume, "rb") as fh:
+            resume_text = extract_text_from_pdf(fh)
+    else:
+        with open(args.resume, "r", encoding="utf-8") as fh:
+            resume_text = fh.read()
+    catalog = JobCatalog(args.catalog)
+    started = time.perf_counter()
+    results = catalog.search(resume_text, args.k, semantic=args.semantic)
+    print(f"{len(catalog)} postings searched in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    for row in results:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Background jobs for the slow parts of a review (rendering, model calls).
+
+The Streamlit script thread only submits a job and polls it; the work runs
+on a process-wide thread pool and its status, partial output and result
+live in a job store that outlives any single script run or browser
+session. Job IDs are derived from the request, so resubmitting the same
+review after a rerun or reconnect attaches to the existing job instead of
+starting the work again.
+
+The default store is in memory. Set JOB_STORE_PATH to keep jobs in SQLite
+so finished results also survive a server restart.
+"""
+import collections
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+ACTIVE = (QUEUED, RUNNING)
+
+DEFAULT_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+DEFAULT_STORE_PATH = os.environ.get("JOB_STORE_PATH") or None
+MAX_FINISHED_JOBS = int(os.environ.get("JOB_STORE_MAX_FINISHED", "200"))
+JOB_TTL_SECONDS = 24 * 3600
+PRUNE_INTERVAL_SECONDS = 60
+
+
+def _new_job(job_id: str) -> dict:
+    now = time.time()
+    return {
+        "id": job_id,
+        "status": QUEUED,
+        "partial": {},
+        "result": None,
+        "error": None,
+        "created": now,
+        "updated": now,
+    }
+
+
+class MemoryJobStore:
+    """
+    Jobs in a dict. A save keeps a shallow copy: job fields and partial
+    values are replaced, never mutated in place, so the streamed text is
+    not copied again on every progress update. Finished jobs are kept in
+    least-recently-used order and capped at max_finished; expired ones are
+    pruned at most once per PRUNE_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs: dict[str, dict] = {}
+        self._finished: collections.OrderedDict[str, None] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    @staticmethod
+    def _copy(job: dict) -> dict:
+        return {**job, "partial": dict(job["partial"])}
+
+    def load(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job_id in self._finished:
+                self._finished.move_to_end(job_id)
+            return self._copy(job)
+
+    def save(self, job: dict) -> None:
+        now = job["updated"] = time.time()
+        with self._lock:
+            self._jobs[job["id"]] = self._copy(job)
+            if job["status"] in ACTIVE:
+                self._finished.pop(job["id"], None)
+            else:
+                self._finished[job["id"]] = None
+                self._finished.move_to_end(job["id"])
+                while len(self._finished) > self.max_finished:
+                    evicted, _ = self._finished.popitem(last=False)
+                    del self._jobs[evicted]
+            if now >= self._next_prune:
+                self._next_prune = now + PRUNE_INTERVAL_SECONDS
+                cutoff = now - JOB_TTL_SECONDS
+                for old in [k for k in self._finished if self._jobs[k]["updated"] < cutoff]:
+                    del self._finished[old], self._jobs[old]
+
+
+class SqliteJobStore:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL,"
+            " data TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+        # Jobs left active by a previous process will never finish
+        with self._lock:
+            for (job_id, data) in self._conn.execute(
+                "SELECT id, data FROM jobs WHERE status IN (?, ?)", ACTIVE
+            ).fetchall():
+                job = json.loads(data)
+                job.update(status=FAILED, error="Interrupted by a server restart. Please resubmit.")
+                self._write(job)
+
+    def _write(self, job: dict) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, status, data, updated) VALUES (?, ?, ?, ?)",
+            (job["id"], job["status"], json.dumps(job), job["updated"]),
+        )
+
+    def load(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, job: dict) -> None:
+        now = job["updated"] = time.time()
+        with self._lock:
+            self._write(job)
+            if now >= self._next_prune:
+                self._next_prune = now + PRUNE_INTERVAL_SECONDS
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE updated < ? AND status NOT IN (?, ?)",
+                    (now - JOB_TTL_SECONDS, *ACTIVE),
+                )
+
+
+class JobRunner:
+    """
+    Runs submitted functions on a thread pool and records their progress.
+
+    The function is called as fn(*args, progress=callback, **kwargs);
+    progress(**fields) merges fields into the job's "partial" dict, which
+    pollers can render before the result is ready. The return value must
+    be JSON-serialisable.
+    """
+
+    def __init__(self, store=None, max_workers: int = DEFAULT_WORKERS):
+        self.store = store or (SqliteJobStore(DEFAULT_STORE_PATH) if DEFAULT_STORE_PATH else MemoryJobStore())
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="review-job")
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: str, fn, *args, force: bool = False, **kwargs) -> str:
+        """
+        Start `fn` under `job_id` unless that job is already queued, running
+        or (without `force`) done; returns the job ID either way.
+        """
+        with self._lock:
+            existing = self.store.load(job_id)
+            if existing and (existing["status"] in ACTIVE or (existing["status"] == DONE and not force)):
+                return job_id
+            job = _new_job(job_id)
+            self.store.save(job)
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job: dict, fn, args, kwargs) -> None:
+        job["status"] = RUNNING
+        self.store.save(job)
+
+        def progress(**fields):
+            job["partial"].update(fields)
+            self.store.save(job)
+
+        try:
+            job["result"] = fn(*args, progress=progress, **kwargs)
+            job["status"] = DONE
+        except Exception as exc:
+            logger.exception("Job %s failed", job["id"])
+            job["status"] = FAILED
+            job["error"] = f"{type(exc).__name__}: {exc}"
+        self.store.save(job)
+
+    def get(self, job_id: str) -> dict | None:
+        return self.store.load(job_id)
@@ -0,0 +1,232 @@
+"""
+Lightweight tracing and metrics for the review pipeline.
+
+A trace is one request (a review, a page render in the app); spans time
+the stages inside it. Every span, counter and token count also feeds a
+process-wide registry that can be scraped as Prometheus text or appended
+to a JSONL file, one line per finished trace.
+
+    with metrics.trace("review") as tr:
+        with metrics.span("extract_text"):
+            ...
+        metrics.count("cache_requests_total", cache="pdf", result="hit")
+    tr.to_dict()   # {"name", "total_ms", "spans": [...], "counters": {...}}
+
+The current trace lives in a context variable, so spans opened on worker
+threads must run under contextvars.copy_context() to land in it.
+
+- METRICS_JSONL: append finished traces to this file
+- METRICS_PORT: serve /metrics in Prometheus text format on this port
+- METRICS_HOST: interface to serve it on (default 127.0.0.1, local only)
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+JSONL_PATH = os.environ.get("METRICS_JSONL") or None
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0")) or None
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+_current = contextvars.ContextVar("metrics_trace", default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape_label(value) -> str:
+    """Label value escaped as the Prometheus text format requires: backslash, double quote, newline."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """Counters, gauges and span-duration summaries shared by every trace in the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[tuple, float] = {}
+        self.gauges: dict[tuple, float] = {}
+        self.durations: dict[tuple, list[float]] = {}   # key -> [count, sum_seconds]
+
+    def inc(self, metric: str, value: float = 1, **labels) -> None:
+        key = (metric, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, metric: str, value: float, **labels) -> None:
+        key = (metric, _label_key(labels))
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        key = ("span_seconds", (("stage", stage),))
+        with self._lock:
+            entry = self.durations.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def prometheus_text(self, prefix: str = "resume_roaster_") -> str:
+        def fmt(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels) + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            durations = sorted(self.durations.items())
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f"# TYPE {prefix}{name} counter")
+                seen.add(name)
+            lines.append(f"{prefix}{name}{fmt(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            if name not in seen:
+                lines.append(f"# TYPE {prefix}{name} gauge")
+                seen.add(name)
+            lines.append(f"{prefix}{name}{fmt(labels)} {value:g}")
+        if durations:
+            lines.append(f"# TYPE {prefix}span_seconds summary")
+        for (name, labels), (count, total) in durations:
+            lines.append(f"{prefix}{name}_count{fmt(labels)} {count}")
+            lines.append(f"{prefix}{name}_sum{fmt(labels)} {total:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.durations.clear()
+
+
+registry = Registry()
+
+
+class Trace:
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.spans: list[dict] = []
+        self.counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.total_ms = None
+
+    def add_span(self, record: dict) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                **self.attrs,
+                "total_ms": self.total_ms,
+                "spans": list(self.spans),
+                "counters": dict(self.counters),
+            }
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def trace(name: str, **attrs):
+    """Start a trace; on exit it is timed, counted and written to METRICS_JSONL if set."""
+    tr = Trace(name, **attrs)
+    token = _current.set(tr)
+    try:
+        yield tr
+    finally:
+        _current.reset(token)
+        tr.total_ms = round((time.perf_counter() - tr._start) * 1000, 2)
+        registry.inc("traces_total", trace=name)
+        if JSONL_PATH:
+            _append_jsonl(JSONL_PATH, tr.to_dict())
+
+
+@contextlib.contextmanager
+def span(stage: str, **attrs):
+    """
+    Time a stage. Yields a dict; keys set on it (e.g. bytes) are stored with
+    the span, and numeric "bytes" is also added to the bytes_total counter.
+    """
+    record = {"stage": stage, **attrs}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        seconds = time.perf_counter() - start
+        record["ms"] = round(seconds * 1000, 2)
+        registry.observe(stage, seconds)
+        if isinstance(record.get("bytes"), int):
+            registry.inc("bytes_total", record["bytes"], stage=stage)
+        tr = _current.get()
+        if tr is not None:
+            tr.add_span(record)
+
+
+def count(metric: str, value: float = 1, **labels) -> None:
+    """Increment a process-wide counter, and the current trace's copy of it."""
+    registry.inc(metric, value, **labels)
+    tr = _current.get()
+    if tr is not None:
+        suffix = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        tr.inc(f"{metric}{{{suffix}}}" if suffix else metric, value)
+
+
+def record_usage(usage, model: str = "") -> None:
+    """Count prompt/completion tokens from an API response's `usage` (object or dict)."""
+    if usage is None:
+        return
+    for field in ("prompt_tokens", "completion_tokens"):
+        value = usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
+        if value:
+            count("tokens_total", value, kind=field.split("_")[0], model=model)
+
+
+def _append_jsonl(path: str, record: dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+    except OSError:
+        logger.warning("Could not append trace to %s", path, exc_info=True)
+
+
+def serve_metrics(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """Serve registry.prometheus_text() at /metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
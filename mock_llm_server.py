@@ -0,0 +1,224 @@
+"""
+Local OpenAI-compatible stand-in for offline throughput runs.
+
+Serves POST /v1/chat/completions (plain, stream=True and JSON
+response_format) with a canned review whose Before/After pairs are taken
+from the resume in the prompt, so the rewrite and scoring stages get real
+work to do. GET /stats reports how many completion requests arrived,
+so a client-side gateway's coalescing can be checked from the outside.
+
+    python mock_llm_server.py --port 8000 --latency 1.5 --rate-limit-every 20
+    python batch.py resumes/ --jd jd.txt --base-url http://127.0.0.1:8000/v1
+"""
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import BULLET_RE
+
+RESUME_BLOCK = re.compile(r'\*\*RESUME(?: TO ANALYZE)?\*\*:\s*"""(.*?)"""', re.S)
+
+
+def _prompt_text(messages) -> str:
+    parts = []
+    for msg in messages:
+        content = msg.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(c.get("text", "") for c in content if c.get("type") == "text")
+    return "\n".join(parts)
+
+
+def _resume_bullets(prompt: str, pairs: int = 5) -> list[str]:
+    m = RESUME_BLOCK.search(prompt)
+    resume = m.group(1) if m else ""
+    bullets = [BULLET_RE.sub("", ln).strip() for ln in resume.splitlines() if BULLET_RE.match(ln)]
+    return [b for b in bullets if b][:pairs]
+
+
+def _rewrite(bullet: str) -> str:
+    return f"{bullet.rstrip('.')}, cutting cycle time by 25% across 3 teams"
+
+
+def canned_rewrites_json(prompt: str) -> str:
+    """Structured-output answer for response_format requests."""
+    return json.dumps({"rewrites": [{"before": b, "after": _rewrite(b)} for b in _resume_bullets(prompt)]})
+
+
+def canned_review(prompt: str, pairs: int = 5) -> str:
+    bullets = _resume_bullets(prompt, pairs)
+
+    lines = [
+        "🔥 **RESUME ROAST**:",
+        "- This resume reads like a terms-of-service page nobody asked for.",
+        "",
+        "✅ **IMPROVED BULLET POINTS**:",
+    ]
+    for b in bullets:
+        lines += [
+            f"  - **Before**: {b}",
+            "",
+            f"    **After**: {_rewrite(b)}",
+            "",
+        ]
+    lines += [
+        "💡 **GENERAL TIPS**:",
+        "- Quantify every bullet.",
+        "- Add the tools named in the job description to Skills.",
+    ]
+    return "\n".join(lines)
+
+
+class MockState:
+    def __init__(self, latency: float, rate_limit_every: int):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def next_request(self) -> int:
+        with self._lock:
+            self.requests = next(self._counter)
+            return self.requests
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send_json(200, {"requests": state.requests})
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length) or b"{}")
+
+            n = state.next_request()
+            if state.rate_limit_every and n % state.rate_limit_every == 0:
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_exceeded"}},
+                    {"Retry-After": "1"},
+                )
+                return
+
+            prompt = _prompt_text(req.get("messages", []))
+            if req.get("response_format", {}).get("type") in ("json_schema", "json_object"):
+                text = canned_rewrites_json(prompt)
+            else:
+                text = canned_review(prompt)
+            model = req.get("model", "mock")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            usage = {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(text) // 4,
+                "total_tokens": (len(prompt) + len(text)) // 4,
+            }
+
+            if not req.get("stream"):
+                time.sleep(state.latency)
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                })
+                return
+
+            # Server-sent events, spreading the latency over the chunks
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            chunks = [text[i:i + 24] for i in range(0, len(text), 24)]
+            delay = state.latency / max(1, len(chunks))
+            for piece in chunks + [None]:
+                event = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": piece} if piece is not None else {},
+                        "finish_reason": None if piece is not None else "stop",
+                    }],
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(delay)
+            if (req.get("stream_options") or {}).get("include_usage"):
+                event = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, latency: float = 1.0, rate_limit_every: int = 0):
+    server = ThreadingHTTPServer((host, port), make_handler(MockState(latency, rate_limit_every)))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per completion")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.latency, args.rate_limit_every)
+    print(f"Mock OpenAI endpoint on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+"""
+Process-wide gateway for chat-completion calls.
+
+Every session's model calls go through one ModelGateway, which
+
+- coalesces in-flight calls with the same request: a double click, or the
+  same resume reviewed in two tabs, makes one upstream call and every
+  caller gets its result (a stream is replayed chunk by chunk to each
+  follower as it arrives)
+- admits calls through two token buckets, requests per minute and tokens
+  per minute. The token cost is estimated up front (prompt text, page
+  images and the completion allowance) and settled against the usage the
+  API reports
+- queues calls the buckets cannot admit yet and serves the waiting
+  sessions round-robin, so one user's burst does not starve the others
+- pauses admissions for everyone when the provider still answers 429
+  (after the client's own retries), honouring Retry-After
+
+client_for(session) returns an object with the same chat.completions.create
+as an OpenAI client, so the pipeline code runs unchanged on top of it.
+
+    python model_gateway.py --sessions 8 --requests 3 --rpm 60    # load test against the mock endpoint
+
+- MODEL_RPM: requests per minute across the process (default 500, 0 = unlimited)
+- MODEL_TPM: tokens per minute across the process (default 30000, 0 = unlimited)
+"""
+import argparse
+import collections
+import hashlib
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from vision_ocr import estimate_image_tokens
+
+logger = logging.getLogger(__name__)
+
+MODEL_RPM = int(os.environ.get("MODEL_RPM", "500")) or None
+MODEL_TPM = int(os.environ.get("MODEL_TPM", "30000")) or None
+
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = estimate_image_tokens(1236, 1600)   # a letter page at the default max_dim
+DEFAULT_COMPLETION_TOKENS = 1500
+DEFAULT_RETRY_AFTER = 2.0     # seconds to pause on a 429 without a Retry-After header
+MAX_POLL = 1.0                # waiters re-check the buckets at least this often
+
+
+def estimate_tokens(request: dict) -> int:
+    """Tokens a chat request may use: prompt text, page images and the completion allowance."""
+    chars = images = 0
+    for message in request.get("messages", []):
+        content = message.get("content")
+        parts = [content] if isinstance(content, str) else content or []
+        for part in parts:
+            if isinstance(part, str):
+                chars += len(part)
+            elif part.get("type") == "image_url":
+                images += 1
+            else:
+                chars += len(part.get("text") or "")
+    completion = request.get("max_tokens") or request.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+    return chars // CHARS_PER_TOKEN + images * IMAGE_TOKENS + completion
+
+
+def request_key(request: dict) -> str:
+    """
+    Digest of everything that shapes the answer. Message parts are hashed
+    one by one, so the image data URLs are not serialized into one more
+    copy of the payload.
+    """
+    sha = hashlib.sha256()
+    options = {k: v for k, v in request.items() if k != "messages"}
+    sha.update(json.dumps(options, sort_keys=True, default=str).encode())
+    for message in request.get("messages", []):
+        sha.update(b"\x00" + str(message.get("role")).encode())
+        content = message.get("content")
+        parts = [content] if isinstance(content, str) else content or []
+        for part in parts:
+            if isinstance(part, str):
+                value = part
+            else:
+                value = part.get("text") or part.get("image_url", {}).get("url", "")
+            sha.update(b"\x01" + value.encode())
+    return sha.hexdigest()
+
+
+def _usage_tokens(usage) -> int | None:
+    if usage is None:
+        return None
+    total = usage.get("total_tokens") if isinstance(usage, dict) else getattr(usage, "total_tokens", None)
+    return int(total) if total is not None else None
+
+
+def _retry_after(exc) -> float:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or DEFAULT_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class TokenBucket:
+    """
+    `per_minute` units refilled continuously, holding at most one minute's
+    worth. None means unlimited. The level may go negative when a call
+    turns out to cost more than estimated; later calls then wait it off.
+    """
+
+    def __init__(self, per_minute: int | None):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0 if per_minute else None
+        self.level = float(per_minute or 0)
+        self._stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` (capped at capacity) can be taken; 0 if now."""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        need = min(amount, self.capacity) - self.level
+        return max(0.0, need / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        if self.rate:
+            self._refill(now)
+            self.level -= amount
+
+    def settle(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) the difference from the estimate."""
+        if self.rate:
+            self.level = min(self.capacity, self.level - delta)
+
+
+class _Flight:
+    """One upstream call that any number of identical requests wait on."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._value = None
+        self._error: BaseException | None = None
+
+    def resolve(self, value) -> None:
+        self._value = value
+        self._done.set()
+
+    def fail(self, error: BaseException) -> None:
+        self._error = error
+        self._done.set()
+
+    def result(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class SharedStream:
+    """
+    A streamed completion read by several callers. Chunks are kept as they
+    arrive; each iterator replays from the first chunk, and whichever
+    reader is ahead pulls the next one from upstream (under its own lock,
+    so readers replaying buffered chunks never wait on the network).
+    on_done(usage) runs once when the upstream stream ends or fails, or
+    when every reader has stopped before the end; the upstream response is
+    then closed.
+    """
+
+    def __init__(self, stream, on_done):
+        self._stream = stream
+        self._upstream = iter(stream)
+        self._on_done = on_done
+        self._chunks = []
+        self._finished = False
+        self._error: BaseException | None = None
+        self._usage = None
+        self._readers = 0
+        self._lock = threading.Lock()         # chunks and state
+        self._pull_lock = threading.Lock()    # one upstream read at a time
+
+    def _finish(self, error=None) -> bool:
+        with self._lock:
+            if self._finished:
+                return False
+            self._finished, self._error = True, error
+        self._on_done(self._usage)
+        return True
+
+    def _pull(self, have: int) -> None:
+        """Read the next upstream chunk, unless another reader already went past `have` chunks."""
+        with self._pull_lock:
+            with self._lock:
+                if self._finished or len(self._chunks) > have:
+                    return
+            try:
+                chunk = next(self._upstream)
+            except StopIteration:
+                self._finish()
+                return
+            except Exception as exc:
+                self._finish(exc)
+                return
+            with self._lock:
+                if getattr(chunk, "usage", None) is not None:
+                    self._usage = chunk.usage
+                self._chunks.append(chunk)
+
+    def _abandon(self) -> None:
+        if self._finish(RuntimeError("The shared stream was closed before it finished")):
+            close = getattr(self._stream, "close", None) or getattr(self._upstream, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    logger.debug("Closing an abandoned stream failed", exc_info=True)
+
+    def __iter__(self):
+        with self._lock:
+            self._readers += 1
+        i = 0
+        try:
+            while True:
+                with self._lock:
+                    ready = i < len(self._chunks)
+                    if ready:
+                        chunk = self._chunks[i]
+                    elif self._finished:
+                        if self._error is not None:
+                            raise self._error
+                        return
+                if not ready:
+                    self._pull(i)
+                    continue
+                i += 1
+                yield chunk
+        finally:
+            # The last reader leaving early (consumer error, GeneratorExit) ends the call for everyone
+            with self._lock:
+                self._readers -= 1
+                abandoned = self._readers == 0 and not self._finished
+            if abandoned:
+                self._abandon()
+
+
+class _Waiter:
+    __slots__ = ("session", "cost", "event")
+
+    def __init__(self, session: str, cost: int):
+        self.session = session
+        self.cost = cost
+        self.event = threading.Event()
+
+
+class ModelGateway:
+    def __init__(self, client, rpm: int | None = MODEL_RPM, tpm: int | None = MODEL_TPM):
+        self.client = client
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._lock = threading.Lock()
+        self._queues: collections.OrderedDict[str, collections.deque] = collections.OrderedDict()
+        self._inflight: dict[str, _Flight] = {}
+        self._paused_until = 0.0
+        self.counts = collections.Counter()    # upstream, coalesced, rate_limited, errors
+        self.max_depth = 0
+
+    # --- public -------------------------------------------------------
+
+    def client_for(self, session: str) -> "GatewayClient":
+        return GatewayClient(self, session)
+
+    def create(self, session: str, **request):
+        """chat.completions.create(**request) for `session`, coalesced and rate-limited."""
+        key = request_key(request)
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+        if not leader:
+            self._count("coalesced")
+            value = flight.result()
+            return iter(value) if isinstance(value, SharedStream) else value
+
+        cost = estimate_tokens(request)
+        try:
+            self._admit(session, cost)
+            self._count("upstream")
+            response = self.client.chat.completions.create(**request)
+        except BaseException as exc:
+            if getattr(exc, "status_code", None) == 429:
+                self._pause(_retry_after(exc))
+            else:
+                self._count("errors")
+            self._settle(cost, 0)
+            self._land(key, flight, error=exc)
+            raise
+
+        if request.get("stream"):
+            shared = SharedStream(response, lambda usage: self._stream_done(key, cost, usage))
+            flight.resolve(shared)
+            return iter(shared)
+        self._settle(cost, _usage_tokens(getattr(response, "usage", None)))
+        self._land(key, flight, value=response)
+        return response
+
+    def stats(self, session: str | None = None) -> dict:
+        """
+        Gateway-wide counts; no other session's ID is included. With
+        `session`, also its queued calls and its turn in the round-robin
+        (1 = served next, None = nothing queued).
+        """
+        with self._lock:
+            own = {}
+            if session is not None:
+                order = list(self._queues)
+                own = {
+                    "queued": len(self._queues.get(session, ())),
+                    "queue_position": order.index(session) + 1 if session in self._queues else None,
+                }
+            return {
+                "queue_depth": sum(len(q) for q in self._queues.values()),
+                "queued_sessions": len(self._queues),
+                **own,
+                "inflight": len(self._inflight),
+                "max_queue_depth": self.max_depth,
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+                **dict(self.counts),
+            }
+
+    # --- admission ----------------------------------------------------
+
+    def _admit(self, session: str, cost: int) -> None:
+        waiter = _Waiter(session, cost)
+        with metrics.span("model_queue_wait", session=session[:8]) as sp:
+            with self._lock:
+                self._queues.setdefault(session, collections.deque()).append(waiter)
+                depth = sum(len(q) for q in self._queues.values())
+                self.max_depth = max(self.max_depth, depth)
+            sp["queue_depth"] = depth
+            delay = self._dispatch()
+            while not waiter.event.wait(timeout=delay):
+                delay = self._dispatch()
+
+    def _dispatch(self) -> float | None:
+        """Admit queued calls the buckets can afford, sessions in turn; returns seconds to the next try."""
+        with self._lock:
+            try:
+                while self._queues:
+                    now = time.monotonic()
+                    session, queue = next(iter(self._queues.items()))
+                    head = queue[0]
+                    wait = max(
+                        self._paused_until - now,
+                        self.requests.wait_time(1, now),
+                        self.tokens.wait_time(head.cost, now),
+                    )
+                    if wait > 0:
+                        return min(max(wait, 0.005), MAX_POLL)
+                    self.requests.take(1, now)
+                    self.tokens.take(head.cost, now)
+                    queue.popleft()
+                    head.event.set()
+                    # Round-robin: the session just served goes to the back of the line
+                    if queue:
+                        self._queues.move_to_end(session)
+                    else:
+                        del self._queues[session]
+                return None
+            finally:
+                self._publish()
+
+    def _settle(self, estimate: int, actual: int | None) -> None:
+        if actual is not None:
+            with self._lock:
+                self.tokens.settle(actual - estimate)
+        self._dispatch()
+
+    def _pause(self, seconds: float) -> None:
+        logger.warning("Model endpoint rate-limited us; pausing admissions for %.1fs", seconds)
+        self._count("rate_limited")
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    # --- bookkeeping --------------------------------------------------
+
+    def _land(self, key: str, flight: _Flight, value=None, error=None) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            flight.fail(error)
+        else:
+            flight.resolve(value)
+        self._publish()
+
+    def _stream_done(self, key: str, cost: int, usage) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        self._settle(cost, _usage_tokens(usage))
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            self.counts[result] += 1
+        metrics.count("model_calls_total", result=result)
+
+    def _publish(self) -> None:
+        # Called with or without the lock held; reads are racy but only feed gauges
+        metrics.registry.set_gauge("model_queue_depth", sum(len(q) for q in list(self._queues.values())))
+        metrics.registry.set_gauge("model_queue_sessions", len(self._queues))
+        metrics.registry.set_gauge("model_inflight", len(self._inflight))
+
+
+class _Completions:
+    def __init__(self, gateway: ModelGateway, session: str):
+        self._gateway = gateway
+        self._session = session
+
+    def create(self, **request):
+        return self._gateway.create(self._session, **request)
+
+
+class _Chat:
+    def __init__(self, gateway: ModelGateway, session: str):
+        self.completions = _Completions(gateway, session)
+
+
+class GatewayClient:
+    """The slice of the OpenAI client the pipeline uses, routed through a gateway for one session."""
+
+    def __init__(self, gateway: ModelGateway, session: str):
+        self.session = session
+        self.chat = _Chat(gateway, session)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))] if values else 0.0
+
+
+def _endpoint_requests(base_url: str) -> int | None:
+    """Completion requests the endpoint saw, from mock_llm_server's /stats; None elsewhere."""
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(base_url.rstrip("/").removesuffix("/v1") + "/stats", timeout=5) as resp:
+            return json.load(resp).get("requests")
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint (default: start mock_llm_server)")
+    parser.add_argument("--sessions", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=3, help="calls per session, all submitted at once")
+    parser.add_argument("--duplicates", type=int, default=2, help="sessions that send the same prompt as session 0")
+    parser.add_argument("--rpm", type=int, default=60)
+    parser.add_argument("--tpm", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.5, help="mock endpoint seconds per completion")
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args(argv)
+
+    from openai import OpenAI
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        from mock_llm_server import serve
+
+        server = serve(port=0, latency=args.latency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    gateway = ModelGateway(OpenAI(api_key="sk-local", base_url=base_url), rpm=args.rpm or None, tpm=args.tpm or None)
+    waits = collections.defaultdict(list)
+
+    def call(session: int, n: int):
+        # Sessions 1..duplicates ask exactly what session 0 asks, as two tabs on one resume would
+        prompt_owner = 0 if session <= args.duplicates else session
+        request = {
+            "model": "gpt-4o",
+            "messages": [{"role": "user", "content": f"Review resume #{prompt_owner}, attempt {n}."}],
+            "temperature": 0.7,
+            "stream": args.stream,
+        }
+        with metrics.trace("gateway_call") as tr:
+            response = gateway.create(f"session-{session}", **request)
+            if args.stream:
+                for _ in response:
+                    pass
+        spans = [s for s in tr.to_dict()["spans"] if s["stage"] == "model_queue_wait"]
+        waits[session].append(spans[0]["ms"] if spans else 0.0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions * args.requests) as pool:
+        futures = [pool.submit(call, s, n) for n in range(args.requests) for s in range(args.sessions)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+    upstream_seen = _endpoint_requests(base_url)
+    if server is not None:
+        server.shutdown()
+
+    all_waits = [w for ws in waits.values() for w in ws]
+    report = {
+        "calls": len(all_waits),
+        "seconds": round(elapsed, 2),
+        "endpoint_requests": upstream_seen,
+        **gateway.stats(),
+        "queue_wait_ms": {"p50": round(_percentile(all_waits, 0.5), 1), "p95": round(_percentile(all_waits, 0.95), 1)},
+        "mean_wait_ms_by_session": {f"session-{s}": round(statistics.mean(ws), 1) for s, ws in sorted(waits.items())},
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
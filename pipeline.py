@@ -0,0 +1,353 @@
+"""
+Two-phase review: a structured rewrite call and a roast/tips call in parallel.
+
+The rewrite call returns Before/After pairs as strict JSON (no regex
+scraping of free-form markdown), so the updated resume and ATS score are
+ready as soon as it returns; the roast call carries the page images and
+the long-form prose. Each phase has its own model and temperature, and the
+wall-clock time is the slower of the two calls rather than one long
+generation. The merged feedback keeps the single-call markdown layout so
+extract_rewrites and the rest of the app work on it unchanged.
+
+run_review wraps a whole "Get Feedback" request (routing, page images,
+compaction, model calls, response cache) as a plain function with no
+Streamlit calls, so it can run as a background job (see jobs.py).
+"""
+import contextvars
+import dataclasses
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from cache import cached_page_payload, cached_text_quality, pdf_digest
+from compaction import compact_prompt_inputs, count_tokens
+from prompts import get_critique_prompt, get_rewrite_prompt, get_roast_prompt
+from response_cache import prompt_fingerprint, response_key
+from text_layer import choose_route
+from utils import RewriteStreamParser
+from vision_ocr import PayloadPolicy
+
+logger = logging.getLogger(__name__)
+
+REWRITE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "rewrites": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "before": {"type": "string"},
+                    "after": {"type": "string"},
+                },
+                "required": ["before", "after"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["rewrites"],
+    "additionalProperties": False,
+}
+
+TIPS_MARKER = "💡 **GENERAL TIPS**"
+# A stray rewrites section in the critique is dropped; the JSON call owns the rewrites
+CRITIQUE_REWRITES_RE = re.compile(r"✅ \*\*IMPROVED BULLET POINTS\*\*.*?(?=💡 \*\*GENERAL TIPS\*\*|\Z)", re.S)
+
+
+def _one_line(text: str) -> str:
+    return " ".join(str(text).split())
+
+
+def request_bytes(messages) -> int:
+    """
+    Approximate request size: prompt text plus image data URLs. Counted from
+    the parts rather than json.dumps, which would copy the whole base64
+    image payload once more just to measure it.
+    """
+    total = 0
+    for message in messages:
+        content = message["content"]
+        parts = [content] if isinstance(content, str) else content
+        for part in parts:
+            if isinstance(part, str):
+                total += len(part)
+            else:
+                total += len(part.get("text") or part.get("image_url", {}).get("url", ""))
+    return total
+
+
+def request_rewrites(client, resume_text, job_role, job_description, *, model, temperature):
+    """Ask for bullet rewrites as schema-validated JSON; returns [{"before", "after"}]."""
+    messages = [{"role": "user", "content": get_rewrite_prompt(resume_text, job_role, job_description)}]
+    with metrics.span("rewrite_call", model=model, request_bytes=request_bytes(messages)):
+        response = client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=messages,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "bullet_rewrites", "strict": True, "schema": REWRITE_SCHEMA},
+            },
+        )
+    metrics.record_usage(response.usage, model)
+    content = response.choices[0].message.content or "{}"
+    try:
+        data = json.loads(content)
+    except ValueError:
+        logger.warning("Rewrite call returned invalid JSON: %r", content[:200])
+        return []
+    items = data.get("rewrites", []) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        logger.warning("Rewrite call returned JSON without a rewrites list: %r", content[:200])
+        return []
+    return [
+        {"before": _one_line(it["before"]), "after": _one_line(it["after"])}
+        for it in items
+        if isinstance(it, dict) and it.get("before") and it.get("after")
+    ]
+
+
+def request_critique(client, resume_text, job_role, job_description, images, *, model, temperature):
+    prompt = get_critique_prompt(resume_text, job_role, job_description, with_images=bool(images))
+    messages = [{"role": "user", "content": [{"type": "text", "text": prompt}, *images]}]
+    with metrics.span("critique_call", model=model, request_bytes=request_bytes(messages)):
+        response = client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=messages,
+        )
+    metrics.record_usage(response.usage, model)
+    return response.choices[0].message.content or ""
+
+
+def rewrites_markdown(rewrites) -> str:
+    """Render pairs in the single-call output format, so extract_rewrites reads them back."""
+    lines = ["✅ **IMPROVED BULLET POINTS**:"]
+    for rw in rewrites:
+        lines += [f"  - **Before**: {rw['before']}", "", f"    **After**: {rw['after']}", ""]
+    return "\n".join(lines)
+
+
+def merge_feedback(critique: str, rewrites) -> str:
+    """Insert the rewrites section between the roast and the tips."""
+    section = rewrites_markdown(rewrites)
+    critique = CRITIQUE_REWRITES_RE.sub("", critique)
+    if TIPS_MARKER in critique:
+        roast, tips = critique.split(TIPS_MARKER, 1)
+        return f"{roast.rstrip()}\n\n{section}\n{TIPS_MARKER}{tips}"
+    return f"{critique.rstrip()}\n\n{section}"
+
+
+def run_two_phase(client, resume_text, job_role, job_description, images=(), *,
+                  rewrite_model="gpt-4o-mini", rewrite_temperature=0.3,
+                  critique_model="gpt-4o", critique_temperature=0.7,
+                  on_rewrites=None) -> dict:
+    """
+    Run the rewrite and critique calls concurrently.
+
+    on_rewrites(rewrites) is called on the caller's thread as soon as the
+    rewrite call finishes, while the critique may still be generating.
+    Returns {"feedback": merged_markdown, "rewrites": [...], "critique": str}.
+    """
+    # Each call runs in a copy of the caller's context so its spans join the current trace
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        rewrite_future = pool.submit(
+            contextvars.copy_context().run, request_rewrites, client, resume_text, job_role, job_description,
+            model=rewrite_model, temperature=rewrite_temperature,
+        )
+        critique_future = pool.submit(
+            contextvars.copy_context().run, request_critique, client, resume_text, job_role, job_description, list(images),
+            model=critique_model, temperature=critique_temperature,
+        )
+        rewrites = rewrite_future.result()
+        if on_rewrites is not None:
+            on_rewrites(rewrites)
+        critique = critique_future.result()
+
+    return {"feedback": merge_feedback(critique, rewrites), "rewrites": rewrites, "critique": critique}
+
+
+PROGRESS_INTERVAL = 0.25   # seconds between partial-text updates while streaming
+
+
+def prompt_version(two_phase: bool) -> str | None:
+    """Fingerprint of the templates a review is built from; None means the roast prompt's default."""
+    if two_phase:
+        return prompt_fingerprint(get_rewrite_prompt) + prompt_fingerprint(get_critique_prompt)
+    return None
+
+
+def prompt_tokens(resume_text, job_role, job_description, *, with_images, two_phase) -> int:
+    """Prompt tokens a review sends: the roast prompt, or the rewrite and critique prompts summed."""
+    if two_phase:
+        prompts = [get_rewrite_prompt(resume_text, job_role, job_description),
+                   get_critique_prompt(resume_text, job_role, job_description, with_images=with_images)]
+    else:
+        prompts = [get_roast_prompt(resume_text, job_role, job_description, with_images=with_images)]
+    return sum(count_tokens(p) for p in prompts)
+
+
+def review_job_id(pdf_bytes, job_role, job_description, *, model, route_mode="auto",
+                  payload_policy=None, compaction_policy=None, two_phase=False,
+                  rewrite_model=None, rewrite_temperature=None, stream=True) -> str:
+    """Stable ID for a review request, so identical submissions share one job."""
+    return response_key(
+        pdf_digest(pdf_bytes), job_description, job_role, model, 0.7,
+        variant=f"job|{route_mode}|{payload_policy!r}|{compaction_policy!r}|"
+                f"{two_phase}|{rewrite_model}@{rewrite_temperature}|{stream}",
+        prompt_version=prompt_version(two_phase),
+    )
+
+
+def run_review(client, pdf_bytes, resume_text, job_role, job_description, *,
+               model="gpt-4o", route_mode="auto", payload_policy=None, compaction_policy=None,
+               two_phase=False, rewrite_model="gpt-4o-mini", rewrite_temperature=0.3,
+               stream=True, response_cache=None, force_fresh=False, progress=None, memory=None) -> dict:
+    """
+    Produce the feedback for one uploaded resume.
+
+    pdf_bytes is the upload as bytes or a StoredUpload (see uploads.py).
+    progress(**fields), when given, receives partial results: "stage",
+    "text" (the streamed review so far) and "rewrites" (pairs ready so far).
+    memory(key, nbytes), when given, is charged with the page-image payload
+    while the request holds it (see session_memory.SessionMemory.charger);
+    it may raise to refuse the payload.
+    Returns {"feedback", "route_info", "payload_report", "prompt_report",
+    "timings"}, where timings is the request's metrics trace.
+    """
+    try:
+        with metrics.trace("review", model=model, two_phase=two_phase) as tr:
+            result = _run_review(
+                client, pdf_bytes, resume_text, job_role, job_description,
+                model=model, route_mode=route_mode, payload_policy=payload_policy,
+                compaction_policy=compaction_policy, two_phase=two_phase, rewrite_model=rewrite_model,
+                rewrite_temperature=rewrite_temperature, stream=stream, response_cache=response_cache,
+                force_fresh=force_fresh, progress=progress, memory=memory or (lambda key, nbytes: None),
+            )
+    finally:
+        if memory is not None:
+            memory("page_images", 0)
+    result["timings"] = tr.to_dict()
+    return result
+
+
+def _run_review(client, pdf_bytes, resume_text, job_role, job_description, *, model, route_mode,
+                payload_policy, compaction_policy, two_phase, rewrite_model, rewrite_temperature,
+                stream, response_cache, force_fresh, progress, memory):
+    progress = progress or (lambda **fields: None)
+    payload_policy = payload_policy or PayloadPolicy()
+    if not pdf_bytes:
+        raise ValueError("Uploaded resume appears to be empty. Please re-upload the file.")
+
+    # Skip page images the text layer already covers
+    progress(stage="Checking the PDF text layer")
+    with metrics.span("text_quality"):
+        text_quality = cached_text_quality(pdf_bytes)
+    route = choose_route(text_quality, route_mode, max_dim=payload_policy.max_dim)
+
+    # Same resume, JD, role, model and images -> reuse the stored critique
+    cache_model = f"{rewrite_model}@{rewrite_temperature}+{model}" if two_phase else model
+    cache_key = response_key(
+        pdf_digest(pdf_bytes), job_description, job_role, cache_model, 0.7,
+        variant=(f"{route['image_pages']}|{payload_policy!r}" if route["image_pages"] else "text")
+        + f"|{compaction_policy!r}",
+        prompt_version=prompt_version(two_phase),
+    )
+    cached = None if force_fresh or response_cache is None else response_cache.get(cache_key)
+    if cached is not None:
+        return {
+            "feedback": cached["feedback"],
+            "route_info": dict(route, image_bytes_sent=0, cached=True),
+            "payload_report": [],
+            "prompt_report": None,
+        }
+
+    if route["image_pages"]:
+        progress(stage=f"Rendering page images {route['image_pages']}")
+        good_pages = tuple(p["page"] for p in text_quality if p["good"])
+        policy = dataclasses.replace(payload_policy, droppable_pages=good_pages)
+        with metrics.span("page_payload"):
+            payload = cached_page_payload(pdf_bytes, policy, pages=route["image_pages"])
+    else:
+        payload = {"blocks": [], "report": []}
+    img_msgs = payload["blocks"]
+    route["image_bytes_sent"] = sum(r["bytes"] for r in payload["report"] if not r["dropped"])
+    memory("page_images", route["image_bytes_sent"])
+
+    with_images = bool(img_msgs)
+    prompt_resume, prompt_jd, prompt_report = resume_text, job_description, None
+    if compaction_policy is not None:
+        with metrics.span("compaction"):
+            prompt_resume, prompt_jd, prompt_report = compact_prompt_inputs(resume_text, job_description, compaction_policy)
+            prompt_report["prompt_tokens_before"] = prompt_tokens(
+                resume_text, job_role, job_description, with_images=with_images, two_phase=two_phase)
+            prompt_report["prompt_tokens_after"] = prompt_tokens(
+                prompt_resume, job_role, prompt_jd, with_images=with_images, two_phase=two_phase)
+
+    progress(stage="Waiting for the model")
+    if two_phase:
+        # Rewrites (JSON) and roast run concurrently; the score shows as soon as rewrites land
+        result = run_two_phase(
+            client, prompt_resume, job_role, prompt_jd, img_msgs,
+            rewrite_model=rewrite_model, rewrite_temperature=rewrite_temperature,
+            critique_model=model, critique_temperature=0.7,
+            on_rewrites=lambda rws: progress(stage="Rewrites ready, waiting for the roast", rewrites=rws),
+        )
+        feedback = result["feedback"]
+    else:
+        prompt = get_roast_prompt(prompt_resume, job_role, prompt_jd, with_images=with_images)
+        messages = [{"role": "user", "content": [{"type": "text", "text": prompt}, *img_msgs]}]
+        with metrics.span("model_call", model=model, stream=stream, request_bytes=request_bytes(messages)) as sp:
+            if stream:
+                response = client.chat.completions.create(
+                    model=model, messages=messages, temperature=0.7, stream=True,
+                    stream_options={"include_usage": True},
+                )
+                feedback, usage = _consume_stream(response, progress, sp)
+            else:
+                response = client.chat.completions.create(
+                    model=model, messages=messages, temperature=0.7,
+                )
+                feedback, usage = response.choices[0].message.content, response.usage
+        metrics.record_usage(usage, model)
+
+    if feedback and response_cache is not None:
+        response_cache.put(cache_key, {"feedback": feedback, "model": cache_model})
+    return {
+        "feedback": feedback,
+        "route_info": route,
+        "payload_report": payload["report"],
+        "prompt_report": prompt_report,
+    }
+
+
+def _consume_stream(stream, progress, span_record=None):
+    """
+    Join a streamed completion, reporting the text and finished rewrite
+    pairs as they arrive. Returns (text, usage); usage comes from the final
+    chunk when the request asked for it. The time to first token is stored
+    on `span_record` as ttft_ms.
+    """
+    parser = RewriteStreamParser()
+    usage = None
+    start, last = time.monotonic(), 0.0
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if span_record is not None and "ttft_ms" not in span_record:
+            span_record["ttft_ms"] = round((time.monotonic() - start) * 1000, 2)
+        new_pairs = parser.feed(delta)
+        now = time.monotonic()
+        if new_pairs or now - last >= PROGRESS_INTERVAL:
+            progress(stage="Writing the review", text=parser.text, rewrites=parser.rewrites)
+            last = now
+    parser.close()
+    return parser.text, usage
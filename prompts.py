@@ -1,10 +1,11 @@
 
-from utils import job_role_to_industry
+from roles import job_role_to_industry
 
-def get_roast_prompt(resume_text, job_role, job_description=""):
+def get_roast_prompt(resume_text, job_role, job_description="", with_images=True):
    industry = job_role_to_industry.get(job_role)
+   source_note = "You will see images of a résumé." if with_images else "You will read the extracted text of a résumé."
    return f"""
-   You will see images of a résumé.
+   {source_note}
 Please act like a hiring manager in {industry}.
 Based on this resume, what would make you more likely to invite me for an interview? What should I change, cut, or add to improve my chances? Be brutally honest but constructive.
 I want my resume to pass ATS filters and still read well to human recruiters. Based on the below job description, can you help me optimize my resume content to include relevant keywords and phrases from the posting in a natural way?
@@ -59,3 +60,59 @@ RESUME ANALYSIS TASK:
 **IMPORTANT**: Make the bullet points performance and metric based similar to the Google's XYZ format. And make fun of the resume in Resume Roast section. Make it humiliating and funny.
 Keep your response focused,  performance based, actionable, and professional.
 """
+
+def get_rewrite_prompt(resume_text, job_role, job_description=""):
+   industry = job_role_to_industry.get(job_role)
+   return f"""
+You are a hiring manager in {industry} rewriting résumé bullets for a {job_role} role.
+
+Pick the 4–6 weakest bullets from the Work Experience section and rewrite each one:
+- strong action verb, clear metric and impact, similar to Google's XYZ format
+- weave in relevant keywords from the job description naturally
+- "before" must be the full, exact bullet text copied from the résumé (no paraphrasing, no truncation, no ellipses, no bullet symbol)
+
+{f"**JOB DESCRIPTION**: {job_description}" if job_description else f"**JOB DESCRIPTION**: Not provided - use general {job_role} requirements"}
+
+**RESUME**:
+\"\"\"
+{resume_text}
+\"\"\"
+
+Respond with JSON only: {{"rewrites": [{{"before": "...", "after": "..."}}]}}
+"""
+
+def get_critique_prompt(resume_text, job_role, job_description="", with_images=True):
+   industry = job_role_to_industry.get(job_role)
+   source_note = "You will see images of a résumé." if with_images else "You will read the extracted text of a résumé."
+   return f"""
+   {source_note}
+Please act like a hiring manager in {industry}.
+Be brutally honest but constructive. Bullet rewrites are handled separately, so do not rewrite bullets.
+
+1. **RESUME ROAST** (Be brutally honest and roast the resume, Make it humiliating and funny, Make it as a joke):
+   - Identify weak, vague, or generic phrases
+   - Flag missing quantifiable achievements
+   - Point out formatting/structure issues
+   - Note missing keywords relevant to {job_role}
+   - Highlight any red flags or inconsistencies
+
+2. **GENERAL ADVICE**:
+   - 2-3 extremely specific tips and skills required for this resume
+   - Suggestions for missing sections if any
+
+{f"**JOB DESCRIPTION**: {job_description}" if job_description else f"**JOB DESCRIPTION**: Not provided - analysis will be based on general {job_role} requirements"}
+
+**RESUME TO ANALYZE**:
+\"\"\"
+{resume_text}
+\"\"\"
+
+**REQUIRED OUTPUT FORMAT**:
+🔥 **RESUME ROAST**:
+- [List specific issues found]
+
+💡 **GENERAL TIPS**:
+- [Specific actionable advice]
+- [Mention the skills required for the job]
+- [Mention the names of the certifications that will be helpful for the job]
+"""
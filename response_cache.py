@@ -0,0 +1,105 @@
+"""
+Persistent cache of AI critiques, so repeat submissions skip the model call.
+
+Entries live in a small SQLite file with a TTL and a size cap (least
+recently used first). The key covers everything that shapes the answer:
+the PDF content hash, the normalized job description, role, model,
+temperature, a fingerprint of the prompt template and any request variant
+(e.g. which page images were attached).
+"""
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import metrics
+import prompts
+
+DEFAULT_PATH = os.environ.get("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3"))
+DEFAULT_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_HOURS", "168")) * 3600
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+
+
+def prompt_fingerprint(func=prompts.get_roast_prompt) -> str:
+    """Short hash of a prompt builder's source; any template edit invalidates old answers."""
+    return hashlib.sha256(inspect.getsource(func).encode()).hexdigest()[:16]
+
+
+def normalize_jd(job_description: str) -> str:
+    return " ".join((job_description or "").split())
+
+
+def response_key(pdf_hash: str, job_description: str, job_role: str, model: str,
+                 temperature: float, variant: str = "", prompt_version: str | None = None) -> str:
+    parts = {
+        "pdf": pdf_hash,
+        "jd": normalize_jd(job_description),
+        "role": job_role,
+        "model": model,
+        "temperature": temperature,
+        "prompt": prompt_version or prompt_fingerprint(),
+        "variant": variant,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str = DEFAULT_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One shared connection guarded by a lock; Streamlit sessions run on separate threads
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created >= ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                metrics.count("cache_requests_total", cache="response", result="miss")
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        metrics.count("cache_requests_total", cache="response", result="hit")
+        return json.loads(row[0])
+
+    def put(self, key: str, value) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
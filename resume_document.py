@@ -0,0 +1,314 @@
+"""
+Structured resume model built once by the extractor.
+
+A ResumeDocument holds the merged lines from iter_resume_lines (or
+iter_docx_lines for Word files) as compact __slots__ records with their
+page, section, bullet prefix and the normalized, lowercased and counted
+forms that matching and scoring need.
+Rewrites edit single lines in place and only that line's derived features
+are recomputed; text() renders the same string extract_text_from_pdf
+returns, so code that still wants a flat string sees no difference.
+"""
+import collections
+import sys
+from typing import Iterable, NamedTuple
+
+import metrics
+from utils import (
+    ACTION_VERB_RE, BULLET_RE, NUMBER_RE, SECTIONS_NEEDED, BulletMatcher, JobDescriptionIndex,
+    impact_points, is_heading, iter_resume_lines, jd_index, length_points, logger, norm,
+    split_prefix, verb_points,
+)
+
+COMPONENTS = ("keyword", "section", "impact", "verb", "length")
+
+
+class DocLine:
+    """One merged resume line and its cached derived forms."""
+
+    __slots__ = ("text", "prefix", "content", "norm", "lower", "page", "section",
+                 "is_bullet", "is_heading", "words", "numbers", "verbs")
+
+    def __init__(self, text: str, page: int = 0, heading: bool | None = None, section: int = 0):
+        self.page = page            # 1-based source page, 0 when built from plain text
+        self.section = section      # index into ResumeDocument.sections
+        self.is_heading = is_heading(text) if heading is None else heading
+        self.set_text(text)
+
+    def set_text(self, text: str, normalized: str | None = None) -> None:
+        self.text = text
+        self.prefix, self.content = split_prefix(text)
+        self.norm = norm(self.content) if normalized is None else normalized
+        self.lower = text.lower()
+        self.is_bullet = bool(BULLET_RE.match(text))
+        self.words = len(text.split())
+        self.numbers = len(NUMBER_RE.findall(text))
+        self.verbs = frozenset(ACTION_VERB_RE.findall(self.lower))
+
+    def copy(self) -> "DocLine":
+        clone = DocLine.__new__(DocLine)
+        for slot in DocLine.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        return clone
+
+
+class Section:
+    """A heading and the half-open range of line indices under it."""
+
+    __slots__ = ("title", "start", "end")
+
+    def __init__(self, title: str | None, start: int, end: int):
+        self.title = title          # None for the block above the first heading
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Section({self.title!r}, {self.start}, {self.end})"
+
+
+class ResumeDocument:
+    __slots__ = ("lines", "sections", "_matcher", "_text", "_listeners")
+
+    def __init__(self, lines: list[DocLine]):
+        self.lines = lines
+        self.sections: list[Section] = []
+        self._matcher: BulletMatcher | None = None
+        self._text: str | None = None
+        self._listeners = []
+        self._assign_sections()
+
+    # --- construction -------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> "ResumeDocument":
+        """Build from (text, page, is_bullet, is_heading) tuples, e.g. ResumeLine."""
+        return cls([DocLine(rec[0], rec[1], rec[3]) for rec in records])
+
+    @classmethod
+    def from_text(cls, text: str) -> "ResumeDocument":
+        """Build from already-merged text; pages are unknown (0). text() round-trips exactly."""
+        return cls([DocLine(ln) for ln in text.split("\n")] if text else [])
+
+    @classmethod
+    def from_pdf(cls, file_obj) -> "ResumeDocument":
+        with metrics.span("extract_text") as sp:
+            doc = cls.from_records(iter_resume_lines(file_obj))
+            sp["lines"] = len(doc.lines)
+        return doc
+
+    @classmethod
+    def from_docx(cls, file_obj) -> "ResumeDocument":
+        from docx_ingest import iter_docx_lines
+
+        with metrics.span("extract_text", format="docx") as sp:
+            doc = cls.from_records(iter_docx_lines(file_obj))
+            sp["lines"] = len(doc.lines)
+        return doc
+
+    def to_records(self) -> list[list]:
+        """JSON-friendly [text, page, is_bullet, is_heading] rows for caching."""
+        return [[ln.text, ln.page, ln.is_bullet, ln.is_heading] for ln in self.lines]
+
+    def copy(self) -> "ResumeDocument":
+        return ResumeDocument([ln.copy() for ln in self.lines])
+
+    def nbytes(self) -> int:
+        """Approximate heap size of the lines and their cached forms (for session accounting)."""
+        size = sys.getsizeof(self.lines)
+        for ln in self.lines:
+            size += sys.getsizeof(ln) + sys.getsizeof(ln.verbs) + sum(
+                sys.getsizeof(s) for s in (ln.text, ln.content, ln.norm, ln.lower)
+            )
+        return size
+
+    def _assign_sections(self) -> None:
+        self.sections = [Section(None, 0, len(self.lines))]
+        for i, ln in enumerate(self.lines):
+            if ln.is_heading and not ln.is_bullet:
+                self.sections[-1].end = i
+                self.sections.append(Section(ln.text, i, len(self.lines)))
+            ln.section = len(self.sections) - 1
+
+    # --- access -------------------------------------------------------
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(ln.text for ln in self.lines)
+        return self._text
+
+    def bullets(self) -> list[int]:
+        return [i for i, ln in enumerate(self.lines) if ln.is_bullet]
+
+    def section_title(self, i: int) -> str | None:
+        return self.sections[self.lines[i].section].title
+
+    # --- editing ------------------------------------------------------
+
+    def _get_matcher(self) -> BulletMatcher:
+        if self._matcher is None:
+            self._matcher = BulletMatcher(
+                [ln.text for ln in self.lines],
+                parts=[(ln.prefix, ln.content, ln.norm) for ln in self.lines],
+            )
+        return self._matcher
+
+    def find(self, before: str):
+        """(line_index, method, score) like BulletMatcher.find."""
+        return self._get_matcher().find(before)
+
+    def subscribe(self, callback) -> None:
+        """Call callback(i) after line i changes (see DocumentScorer)."""
+        self._listeners.append(callback)
+
+    def replace(self, i: int, after: str) -> None:
+        """Replace line i's content, keeping its bullet prefix; only that line is recomputed."""
+        ln = self.lines[i]
+        normalized = norm(after)
+        ln.set_text(f"{ln.prefix}{after}", normalized)
+        if self._matcher is not None:
+            self._matcher.replace(i, after, normalized)
+        self._text = None
+        for callback in self._listeners:
+            callback(i)
+
+    def apply_rewrites(self, rewrites) -> list[dict]:
+        """Apply Before/After pairs in place; returns the same report as utils.match_bullets."""
+        report = []
+        for rw in rewrites:
+            before = rw.get("before", "").strip()
+            after = rw.get("after", "").strip()
+            entry = {"before": before, "after": after, "method": "skipped", "score": 0.0, "line": None}
+            report.append(entry)
+            if not before or not after:
+                continue
+            i, method, score = self.find(before)
+            entry.update(method=method, score=round(score, 3), line=i)
+            if i is None:
+                logger.info("Bullet NOT found (best %.2f): %r", score, before[:70])
+                continue
+            self.replace(i, after)
+        return report
+
+
+def score_components(doc: ResumeDocument, jd_txt="") -> dict[str, float]:
+    """The five ats_score sub-scores from the document's cached line features."""
+    index = jd_txt if isinstance(jd_txt, JobDescriptionIndex) else jd_index(jd_txt)
+    lower = doc.text().lower()
+    hits = index.keyword_hits(lower)
+    verbs = set().union(*(ln.verbs for ln in doc.lines)) if doc.lines else set()
+    return {
+        "keyword": 50 * sum(1 for kw in index.lowered if kw in hits) / len(index.keywords or [1]),
+        "section": 15 * sum(1 for s in SECTIONS_NEEDED if s in lower) / len(SECTIONS_NEEDED),
+        "impact": impact_points(sum(ln.numbers for ln in doc.lines), sum(ln.is_bullet for ln in doc.lines)),
+        "verb": verb_points(len(verbs)),
+        "length": length_points(sum(ln.words for ln in doc.lines)),
+    }
+
+
+def ats_score_document(doc: ResumeDocument, jd_txt="") -> int:
+    """Same value as utils.ats_score(doc.text(), jd_txt)."""
+    parts = score_components(doc, jd_txt)
+    return round(parts["keyword"] + parts["section"] + parts["impact"] + parts["verb"] + parts["length"])
+
+
+class LineFeatures(NamedTuple):
+    keywords: frozenset     # JD keywords contained in the line
+    sections: frozenset     # SECTIONS_NEEDED names contained in the line
+    verbs: frozenset
+    numbers: int
+    bullet: bool
+    words: int
+
+
+def _total(parts: dict) -> int:
+    # Same left-to-right sum and rounding as ats_score
+    return round(parts["keyword"] + parts["section"] + parts["impact"] + parts["verb"] + parts["length"])
+
+
+class DocumentScorer:
+    """
+    ATS score of a ResumeDocument kept up to date as its lines change.
+
+    Holds running aggregates (per-keyword, per-section and per-verb line
+    counts, number, bullet and word totals) and each line's features, so
+    an edit to one line is applied as a delta costing O(line length)
+    instead of rescanning the resume. Keywords, section names and verbs
+    never span a newline, so the per-line union equals the whole-text scan
+    and total() always equals ats_score(doc.text(), jd).
+    """
+
+    def __init__(self, doc: ResumeDocument, jd_txt=""):
+        self.doc = doc
+        self.index = jd_txt if isinstance(jd_txt, JobDescriptionIndex) else jd_index(jd_txt)
+        self.keyword_lines: collections.Counter = collections.Counter()
+        self.section_lines: collections.Counter = collections.Counter()
+        self.verb_lines: collections.Counter = collections.Counter()
+        self.numbers = self.bullets = self.words = 0
+        self._features = [self.line_features(ln) for ln in doc.lines]
+        for f in self._features:
+            self._apply(f, 1)
+        doc.subscribe(self._on_replace)
+
+    def line_features(self, ln: DocLine) -> LineFeatures:
+        return LineFeatures(
+            frozenset(self.index.keyword_hits(ln.lower)),
+            frozenset(s for s in SECTIONS_NEEDED if s in ln.lower),
+            ln.verbs,
+            ln.numbers,
+            ln.is_bullet,
+            ln.words,
+        )
+
+    def _apply(self, f: LineFeatures, sign: int) -> None:
+        for counter, keys in ((self.keyword_lines, f.keywords), (self.section_lines, f.sections),
+                              (self.verb_lines, f.verbs)):
+            for key in keys:
+                counter[key] += sign
+                if counter[key] <= 0:
+                    del counter[key]
+        self.numbers += sign * f.numbers
+        self.bullets += sign * f.bullet
+        self.words += sign * f.words
+
+    def _on_replace(self, i: int) -> None:
+        self._apply(self._features[i], -1)
+        self._features[i] = self.line_features(self.doc.lines[i])
+        self._apply(self._features[i], 1)
+
+    def components(self) -> dict[str, float]:
+        """The five sub-scores, as score_components(doc, jd) would compute them."""
+        index = self.index
+        return {
+            "keyword": 50 * sum(1 for kw in index.lowered if kw in self.keyword_lines) / len(index.keywords or [1]),
+            "section": 15 * len(self.section_lines) / len(SECTIONS_NEEDED),
+            "impact": impact_points(self.numbers, self.bullets),
+            "verb": verb_points(len(self.verb_lines)),
+            "length": length_points(self.words),
+        }
+
+    def total(self) -> int:
+        return _total(self.components())
+
+    def preview(self, i: int, content: str) -> dict[str, float]:
+        """Components if line i's content were `content`, without changing the document."""
+        ln = self.doc.lines[i]
+        candidate = self.line_features(DocLine(f"{ln.prefix}{content}", ln.page, ln.is_heading))
+        old = self._features[i]
+        self._apply(old, -1)
+        self._apply(candidate, 1)
+        try:
+            return self.components()
+        finally:
+            self._apply(candidate, -1)
+            self._apply(old, 1)
+
+    def contribution(self, i: int, content: str, baseline: str) -> dict[str, float]:
+        """
+        Score change from line i reading `content` rather than `baseline`,
+        with every other line as it is now: per component plus "total"
+        (difference of the rounded totals).
+        """
+        with_it, without = self.preview(i, content), self.preview(i, baseline)
+        delta = {k: round(with_it[k] - without[k], 3) for k in COMPONENTS}
+        delta["total"] = _total(with_it) - _total(without)
+        return delta
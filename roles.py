@@ -0,0 +1,8 @@
+# Target roles offered in the app, and the industry each prompt frames the reviewer in
+job_role_to_industry = {
+    "Software Engineer": "Tech / Software Engineering",
+    "Data Scientist": "Tech / Data Science & AI",
+    "Product Manager": "Tech / Product Strategy",
+    "UX Designer": "Design / User Experience",
+    "Cybersecurity Analyst": "Information Security"
+}
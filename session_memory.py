@@ -0,0 +1,108 @@
+"""
+Per-session accounting of resident bytes.
+
+The app charges what each browser session keeps in process memory: the
+upload Streamlit still buffers, the parsed resume document, the review
+text and, while a review runs, its page-image payload. Charges are keyed,
+so re-charging a key on every rerun replaces the old figure instead of
+adding to it. A charge that would take a session over the cap is refused
+with SessionMemoryError and nothing is recorded.
+
+Totals are published as gauges on the metrics registry (bytes across all
+sessions, the largest session, number of sessions). Per-session figures
+are not labelled, to keep metric cardinality flat.
+
+- SESSION_MEMORY_MAX_MB: per-session cap (default 0 = no cap, report only)
+"""
+import os
+import threading
+import uuid
+import weakref
+
+import metrics
+
+SESSION_MEMORY_MAX_BYTES = int(float(os.environ.get("SESSION_MEMORY_MAX_MB", "0")) * 1024 * 1024) or None
+
+
+class SessionMemoryError(RuntimeError):
+    """A charge would take a session over its memory cap."""
+
+
+class SessionHandle:
+    """
+    A session's id; keep it in the session's state. When the state is
+    dropped (session closed) the handle is collected and the session's
+    charges are released, since Streamlit has no session-end callback.
+    """
+
+    def __init__(self, memory: "SessionMemory"):
+        self.id = uuid.uuid4().hex
+        weakref.finalize(self, memory.release, self.id)
+
+
+class SessionMemory:
+    def __init__(self, max_bytes: int | None = SESSION_MEMORY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sessions: dict[str, dict[str, int]] = {}
+
+    def charge(self, session: str, key: str, nbytes: int) -> int:
+        """Set `session`'s charge for `key` to `nbytes` (0 releases it); returns the session total."""
+        nbytes = max(0, int(nbytes))
+        with self._lock:
+            entries = self._sessions.setdefault(session, {})
+            total = sum(entries.values()) - entries.get(key, 0) + nbytes
+            if self.max_bytes and nbytes and total > self.max_bytes:
+                raise SessionMemoryError(
+                    f"This session would hold {total / 2**20:.1f} MB, over the "
+                    f"{self.max_bytes / 2**20:.1f} MB limit ({key}: {nbytes / 2**20:.1f} MB)."
+                )
+            if nbytes:
+                entries[key] = nbytes
+            else:
+                entries.pop(key, None)
+            if not entries:
+                del self._sessions[session]
+        self._publish()
+        return total
+
+    def release(self, session: str, key: str | None = None) -> None:
+        """Drop one key, or everything the session holds."""
+        with self._lock:
+            if key is None:
+                self._sessions.pop(session, None)
+            elif session in self._sessions:
+                self._sessions[session].pop(key, None)
+                if not self._sessions[session]:
+                    del self._sessions[session]
+        self._publish()
+
+    def resident(self, session: str) -> int:
+        with self._lock:
+            return sum(self._sessions.get(session, {}).values())
+
+    def breakdown(self, session: str) -> dict[str, int]:
+        with self._lock:
+            return dict(self._sessions.get(session, {}))
+
+    def totals(self) -> dict[str, int]:
+        """{session: resident bytes} for every session holding anything."""
+        with self._lock:
+            return {s: sum(e.values()) for s, e in self._sessions.items()}
+
+    def open_session(self) -> SessionHandle:
+        return SessionHandle(self)
+
+    def charger(self, session: str):
+        """A charge(key, nbytes) callable bound to `session`, e.g. for run_review(memory=...)."""
+        return lambda key, nbytes: self.charge(session, key, nbytes)
+
+    def _publish(self) -> None:
+        totals = self.totals()
+        metrics.registry.set_gauge("session_resident_bytes", sum(totals.values()))
+        metrics.registry.set_gauge("session_resident_bytes_max", max(totals.values(), default=0))
+        metrics.registry.set_gauge("sessions_resident", len(totals))
+
+
+# Process-wide ledger shared by every Streamlit session
+ledger = SessionMemory()
@@ -0,0 +1,450 @@
+"""
+Offline skill-synonym matching for the keyword part of the ATS score.
+
+The exact keyword check counts "Kubernetes" only where the resume spells
+"kubernetes"; a resume saying "k8s" or "ML" for a JD's "Machine Learning"
+scores nothing for it. This module matches through a compact alias table
+(canonical skill -> the ways resumes write it) with no network calls:
+
+- every surface form in the table gets a hashed character-trigram vector;
+  the vectors are built once into SKILL_INDEX_DIR and memory-mapped after
+- per job description, one matrix product compares its keywords with all
+  surface forms, and each form is lifted to the best similarity of any form
+  of the same skill, so a keyword close to "kubernetes" also claims "k8s"
+- per resume, the surface forms it contains are found by n-gram lookup and
+  the keyword x present-forms slice of that matrix is thresholded in one
+  vectorized step
+
+A resume is matched in well under a millisecond once the JD is indexed.
+utils.JobDescriptionIndex(..., semantic=True) uses this for keyword_hits,
+so ats_score, DocumentScorer and bulk_scoring all count the same matches.
+
+    python skill_match.py build                      # precompute the index
+    python skill_match.py check                      # regression cases for false matches
+    python skill_match.py match resume.pdf --jd jd.txt
+
+- SKILL_INDEX_DIR: where the vectors are stored (default .cache/skill_index)
+- SKILL_MATCH_THRESHOLD: minimum keyword/skill similarity (default 0.8)
+"""
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import zlib
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SKILL_INDEX_DIR = os.environ.get("SKILL_INDEX_DIR", os.path.join(".cache", "skill_index"))
+SIMILARITY_THRESHOLD = float(os.environ.get("SKILL_MATCH_THRESHOLD", "0.8"))
+
+FORMAT_VERSION = 1
+DIM = 512          # hashed feature dimensions per vector
+NGRAM = 3
+
+# Canonical skill -> other ways it is written. Aliases are kept unambiguous:
+# no "go", "r", "ts" or ".net", which collide with ordinary words.
+SKILL_ALIASES: dict[str, tuple[str, ...]] = {
+    "kubernetes": ("k8s",),
+    "docker": ("docker containers",),
+    "machine learning": ("ml",),
+    "deep learning": ("dl",),
+    "artificial intelligence": ("ai",),
+    "generative ai": ("genai", "gen ai"),
+    "large language models": ("large language model", "llm", "llms"),
+    "natural language processing": ("nlp",),
+    "optical character recognition": ("ocr",),
+    "mlops": ("ml ops",),
+    "devops": ("dev ops",),
+    "site reliability engineering": ("sre",),
+    "javascript": ("js", "ecmascript"),
+    "node.js": ("nodejs", "node"),
+    "react": ("reactjs", "react.js"),
+    "vue.js": ("vue", "vuejs"),
+    "angular": ("angularjs",),
+    "html": ("html5",),
+    "css": ("css3",),
+    "c++": ("cpp",),
+    "c#": ("csharp", "c sharp"),
+    "golang": ("go lang",),
+    "postgresql": ("postgres", "psql"),
+    "mongodb": ("mongo",),
+    "sql server": ("mssql", "microsoft sql server"),
+    "elasticsearch": ("elastic search",),
+    "apache spark": ("spark", "pyspark"),
+    "apache kafka": ("kafka",),
+    "scikit-learn": ("sklearn",),
+    "pytorch": ("torch",),
+    "tensorflow": ("tensor flow",),
+    "power bi": ("powerbi",),
+    "amazon web services": ("aws",),
+    "google cloud platform": ("gcp", "google cloud"),
+    "microsoft azure": ("azure",),
+    "continuous integration": ("ci", "ci/cd", "cicd", "continuous deployment", "continuous delivery"),
+    "infrastructure as code": ("iac",),
+    "shell scripting": ("bash scripting", "bash"),
+    "microservices": ("microservice", "micro services", "microservice architecture"),
+    "rest api": ("restful api", "restful apis", "rest apis", "restful"),
+    "apis": ("api", "application programming interface", "application programming interfaces"),
+    "object oriented programming": ("oop", "object oriented design", "ood"),
+    "test driven development": ("tdd",),
+    "software development life cycle": ("sdlc",),
+    "data structures and algorithms": ("dsa",),
+    "computer science": ("cs",),
+    "quality assurance": ("qa",),
+    "extract transform load": ("etl",),
+    "business intelligence": ("bi",),
+    "data visualization": ("data viz", "dataviz"),
+    "a/b testing": ("ab testing", "split testing"),
+    "key performance indicators": ("kpi", "kpis"),
+    "objectives and key results": ("okr", "okrs"),
+    "return on investment": ("roi",),
+    "go-to-market": ("gtm",),
+    "product requirements documents": ("product requirements document", "prd", "prds"),
+    "minimum viable product": ("mvp",),
+    "software as a service": ("saas",),
+    "agile methodologies": ("agile", "agile methodology"),
+    "search engine optimization": ("seo",),
+    "customer relationship management": ("crm",),
+    "enterprise resource planning": ("erp",),
+    "service level agreements": ("service level agreement", "sla", "slas"),
+    "user experience": ("ux", "ux design", "user experience design"),
+    "user interface": ("ui", "ui design", "user interface design"),
+    "user research": ("ux research",),
+    "human computer interaction": ("hci",),
+    "graphical user interface": ("gui",),
+    "cybersecurity": ("cyber security",),
+    "information security": ("infosec",),
+    "penetration testing": ("pentesting", "pen testing", "pentest"),
+    "security operations center": ("soc",),
+    "security information and event management": ("siem",),
+    "identity and access management": ("iam",),
+    "role based access control": ("rbac",),
+    "multi factor authentication": ("mfa", "2fa", "two factor authentication"),
+    "general data protection regulation": ("gdpr",),
+    "electronic health records": ("ehr", "emr", "electronic medical records"),
+}
+
+# Short forms that are also ordinary words ("carried a torch", "CS: Counter-Strike")
+# count only with one of these words within CONTEXT_WINDOW words on the same line
+CONTEXT_WINDOW = 2
+CONTEXT_WORDS: dict[str, frozenset[str]] = {
+    "torch": frozenset({"nn", "cuda", "autograd", "lightning", "tensor", "tensors", "jit", "distributed", "compile"}),
+    "cs": frozenset({"degree", "major", "minor", "bs", "bsc", "ms", "msc", "ba", "phd", "student", "graduate",
+                     "coursework", "fundamentals", "department"}),
+    "node": frozenset({"js", "server", "backend", "express", "npm", "typescript", "javascript", "runtime",
+                       "service", "services"}),
+    "spark": frozenset({"job", "jobs", "sql", "streaming", "cluster", "clusters", "dataframe", "dataframes",
+                        "rdd", "rdds", "hadoop", "databricks", "scala", "mllib", "etl", "pipeline", "pipelines"}),
+    "bash": frozenset({"script", "scripts", "scripting", "shell", "linux", "unix", "zsh", "cron"}),
+    "api": frozenset({"design", "development", "integration", "integrations", "gateway", "endpoint", "endpoints",
+                      "rest", "restful", "graphql", "http", "documentation", "versioning", "clients"}),
+    "ci": frozenset({"cd", "pipeline", "pipelines", "build", "builds", "jenkins", "github", "gitlab", "circleci",
+                     "workflow", "workflows"}),
+    "soc": frozenset({"analyst", "analysts", "tier", "l1", "l2", "l3", "siem", "triage", "monitoring"}),
+    "agile": frozenset({"scrum", "kanban", "sprint", "sprints", "ceremonies", "coach", "methodology",
+                        "methodologies", "framework", "practices", "delivery", "development"}),
+}
+
+# Words keep "+" and "#" so c++ and c# survive; everything else splits
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*|\n")
+
+
+def normalize(text: str) -> str:
+    """Lowercased words joined by single spaces: "Node.js" -> "node js", "CI/CD" -> "ci cd"."""
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+def _features(phrase: str) -> list[int]:
+    padded = f" {phrase} "
+    grams = [padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)]
+    # crc32 rather than hash(): the buckets must not change between processes
+    return [zlib.crc32(g.encode()) % DIM for g in grams + phrase.split()]
+
+
+def hashed_vectors(phrases: Iterable[str]) -> np.ndarray:
+    """L2-normalized hashed character-trigram (plus whole-word) vectors, shape (n, DIM)."""
+    phrases = list(phrases)
+    out = np.zeros((len(phrases), DIM), dtype=np.float32)
+    for i, phrase in enumerate(phrases):
+        np.add.at(out[i], _features(phrase), 1.0)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    return out / np.maximum(norms, 1e-12)
+
+
+def _fingerprint(aliases: dict) -> str:
+    raw = json.dumps([FORMAT_VERSION, DIM, NGRAM, aliases], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class SkillIndex:
+    """
+    Every surface form of the alias table (normalized), grouped by skill,
+    with its hashed vector. Rows of one skill are contiguous, starting at
+    skill_starts[s], so per-skill maxima are one np.maximum.reduceat.
+    """
+
+    def __init__(self, skills: list[str], phrases: list[str], skill_of: np.ndarray, vectors: np.ndarray):
+        self.skills = skills
+        self.phrases = phrases
+        self.skill_of = skill_of
+        self.vectors = vectors
+        starts = np.r_[True, skill_of[1:] != skill_of[:-1]]
+        self.skill_starts = np.flatnonzero(starts)
+        self.group_of = np.cumsum(starts) - 1       # row -> position in skill_starts
+        self.row_of = {p: i for i, p in enumerate(phrases)}
+        self.first_words = {p.split()[0] for p in phrases}
+        self.max_words = max(len(p.split()) for p in phrases)
+
+    @staticmethod
+    def _table(aliases: dict) -> tuple[list[str], list[str], list[int]]:
+        skills, phrases, skill_of, seen = [], [], [], set()
+        for skill, forms in aliases.items():
+            skills.append(skill)
+            for form in (skill, *forms):
+                phrase = normalize(form)
+                if phrase and phrase not in seen:
+                    seen.add(phrase)
+                    phrases.append(phrase)
+                    skill_of.append(len(skills) - 1)
+        return skills, phrases, skill_of
+
+    @classmethod
+    def build(cls, aliases: dict = SKILL_ALIASES) -> "SkillIndex":
+        skills, phrases, skill_of = cls._table(aliases)
+        return cls(skills, phrases, np.array(skill_of, dtype=np.int32), hashed_vectors(phrases))
+
+    def save(self, path: str, aliases: dict = SKILL_ALIASES) -> None:
+        os.makedirs(path, exist_ok=True)
+        # Vectors first, metadata last: a reader only trusts vectors the metadata vouches for
+        fd, tmp = tempfile.mkstemp(dir=path, suffix=".npy")
+        with os.fdopen(fd, "wb") as fh:
+            np.save(fh, np.ascontiguousarray(self.vectors))
+        os.replace(tmp, os.path.join(path, "vectors.npy"))
+        meta = {
+            "version": FORMAT_VERSION, "fingerprint": _fingerprint(aliases),
+            "skills": self.skills, "phrases": self.phrases, "skill_of": self.skill_of.tolist(),
+        }
+        fd, tmp = tempfile.mkstemp(dir=path, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, os.path.join(path, "skill_index.json"))
+
+    @classmethod
+    def load(cls, path: str = SKILL_INDEX_DIR, aliases: dict = SKILL_ALIASES) -> "SkillIndex":
+        """Memory-map a saved index; build (and try to save) one if it is missing or stale."""
+        try:
+            with open(os.path.join(path, "skill_index.json"), "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("fingerprint") == _fingerprint(aliases):
+                vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+                return cls(meta["skills"], meta["phrases"], np.array(meta["skill_of"], dtype=np.int32), vectors)
+        except (OSError, ValueError, KeyError):
+            pass
+        index = cls.build(aliases)
+        try:
+            index.save(path, aliases)
+        except OSError as exc:
+            logger.warning("Could not store the skill index in %s (%s); using it from memory", path, exc)
+        return index
+
+    def find(self, text: str, rows=None) -> dict[int, str]:
+        """{row: phrase} for every surface form in `text` (only `rows`, if given); phrases never span lines."""
+        if rows is None:
+            row_of, first_words, max_words = self.row_of, self.first_words, self.max_words
+        else:
+            row_of = {self.phrases[r]: r for r in rows}
+            first_words = {p.split()[0] for p in row_of}
+            max_words = max((len(p.split()) for p in row_of), default=0)
+        return _scan(text, row_of, first_words, max_words)
+
+
+def _in_context(words: list[str], i: int, n: int, wanted: frozenset[str]) -> bool:
+    """True when a word in `wanted` is within CONTEXT_WINDOW words of words[i:i + n], on the same line."""
+    before = words[max(0, i - CONTEXT_WINDOW):i]
+    after = words[i + n:i + n + CONTEXT_WINDOW]
+    if "\n" in before:
+        before = before[len(before) - before[::-1].index("\n"):]
+    if "\n" in after:
+        after = after[:after.index("\n")]
+    return not wanted.isdisjoint(before + after)
+
+
+def _scan(text: str, row_of: dict, first_words: set, max_words: int) -> dict[int, str]:
+    if not row_of:
+        return {}
+    # One regex pass; newlines come out as tokens no phrase contains, so n-grams stop there
+    words = TOKEN_RE.findall(text.lower())
+    found = {}
+    for i in [i for i, w in enumerate(words) if w in first_words]:
+        for n in range(min(max_words, len(words) - i), 0, -1):
+            phrase = " ".join(words[i:i + n])
+            row = row_of.get(phrase)
+            if row is None or row in found:
+                continue
+            wanted = CONTEXT_WORDS.get(phrase)
+            if wanted is None or _in_context(words, i, n, wanted):
+                found[row] = phrase
+    return found
+
+
+def _partial(a: str, b: str) -> bool:
+    """True when one phrase's words are a proper subset of the other's."""
+    wa, wb = set(a.split()), set(b.split())
+    return wa != wb and (wa <= wb or wb <= wa)
+
+
+@functools.lru_cache(maxsize=1)
+def skill_index() -> SkillIndex:
+    """The process-wide index, loaded on first use."""
+    return SkillIndex.load()
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str
+    skill: str | None       # canonical skill the keyword was matched through
+    phrase: str | None      # the surface form found in the resume
+    similarity: float
+
+
+class SkillMatcher:
+    """
+    Matches one job description's keywords against resumes through the
+    skill table. scores[k, row] is keyword k's similarity to the skill that
+    surface form `row` belongs to (best over that skill's forms).
+
+    A keyword claims a skill only by matching one of its forms as a whole:
+    when either is a proper part of the other ("Experience" in "user
+    experience", "machine learning" in "Machine Learning Models"), the pair
+    does not count, however close the trigram vectors are.
+    """
+
+    def __init__(self, keywords: list[str], index: SkillIndex | None = None,
+                 threshold: float = SIMILARITY_THRESHOLD):
+        self.keywords = list(keywords)
+        self.index = index or skill_index()
+        self.threshold = threshold
+        if self.keywords:
+            normalized = [normalize(k) for k in self.keywords]
+            sims = hashed_vectors(normalized) @ np.asarray(self.index.vectors).T
+            for k, row in np.argwhere(sims >= threshold).tolist():
+                if _partial(normalized[k], self.index.phrases[row]):
+                    sims[k, row] = 0.0
+            per_skill = np.maximum.reduceat(sims, self.index.skill_starts, axis=1)
+        else:
+            per_skill = np.zeros((0, len(self.index.skill_starts)), dtype=np.float32)
+        self.scores = per_skill[:, self.index.group_of]
+        # Only forms some keyword can claim are worth looking for in a resume
+        claimable = np.flatnonzero((self.scores >= threshold).any(axis=0)).tolist()
+        self._row_of = {self.index.phrases[r]: r for r in claimable}
+        self._first_words = {p.split()[0] for p in self._row_of}
+        self._max_words = max((len(p.split()) for p in self._row_of), default=0)
+
+    def matches(self, resume_text: str) -> list[KeywordMatch | None]:
+        """Best skill match per keyword at or over the threshold, else None; in keyword order."""
+        found = _scan(resume_text, self._row_of, self._first_words, self._max_words)
+        if not found or not self.keywords:
+            return [None] * len(self.keywords)
+        rows = np.fromiter(found, dtype=np.int64, count=len(found))
+        block = self.scores[:, rows]
+        best = block.argmax(axis=1)
+        best_score = block[np.arange(len(self.keywords)), best]
+        out = []
+        for k, (j, score) in enumerate(zip(best.tolist(), best_score.tolist())):
+            if score < self.threshold:
+                out.append(None)
+                continue
+            row = int(rows[j])
+            out.append(KeywordMatch(self.keywords[k], self.index.skills[self.index.skill_of[row]],
+                                    found[row], round(score, 3)))
+        return out
+
+
+# (JD keyword, resume line, skill it must be matched through or None); `python skill_match.py check`
+REGRESSION_CASES: tuple[tuple[str, str, str | None], ...] = (
+    # a generic keyword is only part of a skill's name
+    ("Experience", "Led UX for the checkout flow", None),
+    ("Testing", "Ran split testing on the pricing page", None),
+    ("Interface Design", "Shipped the new UI", None),
+    # short forms that are also ordinary words
+    ("PyTorch", "Carried a torch in the Olympic relay", None),
+    ("PyTorch", "Wrote custom torch.nn modules", "pytorch"),
+    ("Computer Science", "CS: Counter-Strike champion", None),
+    ("Computer Science", "CS degree, University of Leeds", "computer science"),
+    ("Apache Spark", "Replaced spark plugs at the garage", None),
+    ("Apache Spark", "Tuned Spark jobs on EMR", "apache spark"),
+    ("Node.js", "Every node of the org chart", None),
+    ("Shell Scripting", "Planned a birthday bash", None),
+    ("Shell Scripting", "Automated backups with bash scripts", "shell scripting"),
+    ("APIs", "API gravity of crude samples", None),
+    ("Continuous Integration", "CI/CD with GitHub Actions", "continuous integration"),
+    ("Security Operations Center", "SOC 2 audit preparation", None),
+    ("Agile Methodologies", "An agile learner", None),
+    # real synonyms still match
+    ("Kubernetes", "Ran services on k8s", "kubernetes"),
+    ("Machine Learning", "Built ML models", "machine learning"),
+)
+
+
+def check(index: SkillIndex | None = None) -> list[str]:
+    """Run REGRESSION_CASES; one message per case that does not match as expected."""
+    failures = []
+    for keyword, line, expected in REGRESSION_CASES:
+        match = SkillMatcher([keyword], index).matches(line)[0]
+        got = match.skill if match else None
+        if got != expected:
+            failures.append(f"{keyword!r} in {line!r}: expected {expected}, got {got}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="precompute the skill vectors")
+    build.add_argument("--out", default=SKILL_INDEX_DIR)
+    sub.add_parser("check", help="run the regression cases; exit 1 on any mismatch")
+    match = sub.add_parser("match", help="per-keyword match breakdown of a resume against a JD")
+    match.add_argument("resume", help="PDF, DOCX or plain-text resume")
+    match.add_argument("--jd", required=True, help="job description text file")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = SkillIndex.build()
+        index.save(args.out)
+        print(f"{len(index.skills)} skills, {len(index.phrases)} surface forms -> {args.out}")
+        return 0
+    if args.command == "check":
+        failures = check(SkillIndex.build())
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        print(f"{len(REGRESSION_CASES) - len(failures)}/{len(REGRESSION_CASES)} cases pass")
+        return 1 if failures else 0
+
+    from resume_document import ResumeDocument
+    from utils import JobDescriptionIndex
+
+    with open(args.jd, "r", encoding="utf-8") as fh:
+        jd_txt = fh.read()
+    lower = args.resume.lower()
+    with open(args.resume, "rb") as fh:
+        if lower.endswith(".pdf"):
+            resume_text = ResumeDocument.from_pdf(fh).text()
+        elif lower.endswith(".docx"):
+            resume_text = ResumeDocument.from_docx(fh).text()
+        else:
+            resume_text = fh.read().decode("utf-8", errors="replace")
+    for row in JobDescriptionIndex(jd_txt, semantic=True).keyword_matches(resume_text):
+        print(json.dumps(row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Text-layer quality checks and the text / hybrid / vision routing policy.
+
+Most resumes are exported with a clean text layer, in which case the page
+images only duplicate what extract_text_from_pdf already sent. Pages whose
+text layer is missing or garbled (scans, outlined fonts, broken ToUnicode
+maps) are the ones the vision model actually needs to see.
+"""
+import logging
+
+from uploads import open_source
+from vision_ocr import estimate_image_tokens
+
+logger = logging.getLogger(__name__)
+
+ROUTE_TEXT = "text"        # text only, no page images
+ROUTE_HYBRID = "hybrid"    # text plus images of the low-quality pages
+ROUTE_VISION = "vision"    # text plus every page image (previous behaviour)
+
+MIN_CHARS_PER_PAGE = 40
+MAX_GARBAGE_RATIO = 0.05
+MAX_IMAGE_AREA = 0.6       # a page mostly covered by an image is treated as scanned
+
+
+def _is_garbage(ch: str) -> bool:
+    if not ch or ch == "\ufffd" or ch.startswith("(cid:"):
+        return True
+    code = ord(ch[0])
+    # Private-use glyphs and control characters mean the font has no usable Unicode map
+    return 0xE000 <= code <= 0xF8FF or (code < 32 and ch not in "\t\n\r")
+
+
+def page_text_quality(page, page_no: int) -> dict:
+    chars = page.chars
+    n = len(chars)
+    garbage = sum(1 for c in chars if _is_garbage(c.get("text", "")))
+    page_area = float(page.width * page.height) or 1.0
+    image_area = sum(
+        max(0.0, float(im["x1"] - im["x0"])) * max(0.0, float(im["bottom"] - im["top"]))
+        for im in page.images
+    )
+
+    glyph_coverage = (n - garbage) / n if n else 0.0
+    garbage_ratio = garbage / n if n else 1.0
+    image_ratio = min(1.0, image_area / page_area)
+    good = (
+        n - garbage >= MIN_CHARS_PER_PAGE
+        and garbage_ratio <= MAX_GARBAGE_RATIO
+        and image_ratio <= MAX_IMAGE_AREA
+    )
+    return {
+        "page": page_no,
+        "chars": n,
+        "glyph_coverage": round(glyph_coverage, 3),
+        "garbage_ratio": round(garbage_ratio, 3),
+        "image_ratio": round(image_ratio, 3),
+        "width_pts": float(page.width),
+        "height_pts": float(page.height),
+        "good": good,
+    }
+
+
+def analyze_text_layer(pdf_bytes) -> list[dict]:
+    """Per-page text-layer quality from pdfplumber character data (bytes or a StoredUpload)."""
+    import pdfplumber
+
+    pages = []
+    with open_source(pdf_bytes) as fh, pdfplumber.open(fh) as pdf:
+        for page_no, page in enumerate(pdf.pages, start=1):
+            try:
+                pages.append(page_text_quality(page, page_no))
+            finally:
+                page.close()
+    return pages
+
+
+def choose_route(pages: list[dict], mode: str = "auto", max_dim: int = 1600) -> dict:
+    """
+    Decide which page images to send alongside the extracted text.
+
+    mode is "auto", or ROUTE_TEXT / ROUTE_VISION to force a route. In auto
+    mode a clean document goes text-only, a document that is mostly bad
+    goes full vision, and anything in between sends only the bad pages.
+    The estimate of vision tokens saved uses the same high-detail formula
+    as vision_ocr at `max_dim`.
+    """
+    bad = [p["page"] for p in pages if not p["good"]]
+    if mode == ROUTE_TEXT:
+        route, image_pages = ROUTE_TEXT, []
+    elif mode == ROUTE_VISION or not pages:
+        route, image_pages = ROUTE_VISION, [p["page"] for p in pages]
+    elif not bad:
+        route, image_pages = ROUTE_TEXT, []
+    elif len(bad) * 2 > len(pages):
+        route, image_pages = ROUTE_VISION, [p["page"] for p in pages]
+    else:
+        route, image_pages = ROUTE_HYBRID, bad
+
+    skipped = [p for p in pages if p["page"] not in set(image_pages)]
+    tokens_saved = 0
+    for p in skipped:
+        scale = max_dim / max(p["width_pts"], p["height_pts"], 1.0)
+        tokens_saved += estimate_image_tokens(p["width_pts"] * scale, p["height_pts"] * scale)
+
+    decision = {
+        "route": route,
+        "image_pages": image_pages,
+        "skipped_pages": [p["page"] for p in skipped],
+        "low_quality_pages": bad,
+        "est_image_tokens_saved": tokens_saved,
+    }
+    logger.info("Vision route %s: images for pages %s, ~%d image tokens saved",
+                route, image_pages, tokens_saved)
+    return decision
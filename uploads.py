@@ -0,0 +1,138 @@
+"""
+Resume uploads kept in a temp file instead of in session memory.
+
+A StoredUpload copies the uploaded stream to disk in chunks, hashing as it
+goes, and is read back through file objects or the file path itself
+(poppler renders straight from it). Nothing downstream needs the whole
+resume as one bytes object, so a session holds a path and a digest rather
+than another copy of the file. The file is deleted when the
+upload object is garbage-collected (e.g. with its Streamlit session) or at
+interpreter exit.
+
+Every function that takes resume bytes (cache, pipeline, vision_ocr,
+docx_ingest) accepts either raw bytes or a StoredUpload; use open_source
+and source_path to read one without caring which.
+
+- UPLOAD_DIR: where upload files are spooled (default: the system temp dir)
+"""
+import contextlib
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import weakref
+from typing import BinaryIO, Iterator, Union
+
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR") or None
+CHUNK_SIZE = 1024 * 1024
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class StoredUpload:
+    """An uploaded file on disk with its name, MIME type, size and sha256 digest."""
+
+    def __init__(self, path: str, name: str, type: str, size: int, digest: str):
+        self.path = path
+        self.name = name
+        self.type = type
+        self.size = size
+        self.digest = digest
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, name: str = "resume", type: str = "",
+                    directory: str | None = UPLOAD_DIR) -> "StoredUpload":
+        """Copy `stream` (e.g. Streamlit's UploadedFile) to a temp file, CHUNK_SIZE at a time."""
+        try:
+            stream.seek(0)
+        except Exception:
+            pass
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=os.path.splitext(name)[1], dir=directory)
+        sha, size = hashlib.sha256(), 0
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha.update(chunk)
+                    fh.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            _remove(path)
+            raise
+        return cls(path, name, type, size, sha.hexdigest())
+
+    @classmethod
+    def from_bytes(cls, data: bytes, name: str = "resume", type: str = "",
+                   directory: str | None = UPLOAD_DIR) -> "StoredUpload":
+        return cls.from_stream(io.BytesIO(data), name, type, directory)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self):
+        return f"StoredUpload({self.name!r}, {self.size} bytes, {self.digest[:12]})"
+
+    def open(self) -> BinaryIO:
+        return open(self.path, "rb")
+
+    def getvalue(self) -> bytes:
+        """The whole file as bytes (a copy); prefer open() or the path."""
+        with self.open() as fh:
+            return fh.read()
+
+    def close(self) -> None:
+        """Delete the file now rather than when the object is collected."""
+        self._finalizer()
+
+
+Source = Union[bytes, bytearray, memoryview, StoredUpload]
+
+
+def source_digest(source: Source) -> str:
+    """sha256 of the contents; free for a StoredUpload, which hashed while spooling."""
+    if isinstance(source, StoredUpload):
+        return source.digest
+    return hashlib.sha256(source).hexdigest()
+
+
+def open_source(source: Source) -> BinaryIO:
+    """A fresh binary file object over the contents; close it when done."""
+    if isinstance(source, StoredUpload):
+        return source.open()
+    return io.BytesIO(source)
+
+
+def read_head(source: Source, n: int) -> bytes:
+    if isinstance(source, StoredUpload):
+        with source.open() as fh:
+            return fh.read(n)
+    return bytes(source[:n])
+
+
+@contextlib.contextmanager
+def source_path(source: Source, suffix: str = ".pdf") -> Iterator[str]:
+    """A filesystem path holding the contents; raw bytes are written to a temp file for the duration."""
+    if isinstance(source, StoredUpload):
+        yield source.path
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"resume{suffix}")
+        with open(path, "wb") as fh:
+            fh.write(source)
+        yield path
+
+
+def copy_to(source: Source, path: str) -> None:
+    with open_source(source) as src, open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
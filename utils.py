@@ -1,61 +1,84 @@
 import re
-import pdfplumber
-import collections,math
-from typing import List
-import difflib
+import collections,math,functools
+from typing import Iterator, List, NamedTuple
+import logging
+
+import metrics
+from roles import job_role_to_industry   # re-exported; prompts imports it from roles directly
 
 BULLET_RE = re.compile(
     r"^\s*(?:[\u2022\u2023\u25E6\u2043\u2219\-\*\u00B7]|[0-9]+[.)])\s*"
 )  # •, -, *, 1)
 
-def extract_text_from_pdf(file_obj) -> str:
+logger = logging.getLogger(__name__)
+
+class ResumeLine(NamedTuple):
+    text: str
+    page: int          # 1-based page the line starts on
+    is_bullet: bool
+    is_heading: bool
+
+def iter_resume_lines(file_obj) -> Iterator[ResumeLine]:
+    """
+    Yield merged resume lines as each page is parsed.
 
+    Bullets wrapped over several lines (even across a page break) are
+    merged into one line. Each page's cached layout objects are released
+    as soon as its text is read, so memory stays flat on long documents.
+    """
     try:
         file_obj.seek(0)
     except Exception:
         pass
 
-    raw_lines: list[str] = []
-    with pdfplumber.open(file_obj) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text() or ""
-            raw_lines.extend(page_text.splitlines())
+    import pdfplumber   # heavy (pdfminer); only needed once a PDF is actually parsed
 
-    merged_lines: list[str] = []
     current_bullet: str | None = None
+    bullet_page = 0
 
-    def flush_bullet():
-        nonlocal current_bullet
-        if current_bullet is not None:
-            merged_lines.append(current_bullet.strip())
-            current_bullet = None
-
-    for ln in raw_lines:
-        if not ln.strip():
-            # Blank line
-            flush_bullet()
-            merged_lines.append("")
-            continue
-
-        if BULLET_RE.match(ln):
-            # New bullet
-            flush_bullet()
-            current_bullet = ln.strip()
-            continue
-
-        #Continuation of a bullet
-        if current_bullet is not None:
-            if ln.startswith(" ") or (not BULLET_RE.match(ln) and not is_heading(ln)):
-                current_bullet += " " + ln.strip()
-                continue
-
-        #non-bullet line(heading/section/etc.)
-        flush_bullet()
-        merged_lines.append(ln.strip())
-
-    flush_bullet()
+    with pdfplumber.open(file_obj) as pdf:
+        for page_no, page in enumerate(pdf.pages, start=1):
+            try:
+                page_text = page.extract_text() or ""
+            finally:
+                page.close()
+
+            for ln in page_text.splitlines():
+                if not ln.strip():
+                    # Blank line
+                    if current_bullet is not None:
+                        yield ResumeLine(current_bullet.strip(), bullet_page, True, False)
+                        current_bullet = None
+                    yield ResumeLine("", page_no, False, False)
+                    continue
+
+                if BULLET_RE.match(ln):
+                    # New bullet
+                    if current_bullet is not None:
+                        yield ResumeLine(current_bullet.strip(), bullet_page, True, False)
+                    current_bullet, bullet_page = ln.strip(), page_no
+                    continue
+
+                heading = is_heading(ln)
+                #Continuation of a bullet
+                if current_bullet is not None:
+                    if ln.startswith(" ") or not heading:
+                        current_bullet += " " + ln.strip()
+                        continue
+                    yield ResumeLine(current_bullet.strip(), bullet_page, True, False)
+                    current_bullet = None
+
+                #non-bullet line(heading/section/etc.)
+                yield ResumeLine(ln.strip(), page_no, False, heading)
+
+    if current_bullet is not None:
+        yield ResumeLine(current_bullet.strip(), bullet_page, True, False)
 
-    return "\n".join(merged_lines)
+def extract_text_from_pdf(file_obj) -> str:
+    with metrics.span("extract_text") as sp:
+        text = "\n".join(line.text for line in iter_resume_lines(file_obj))
+        sp["chars"] = len(text)
+    return text
 
 #Parse Before / After
 BEFORE_AFTER = re.compile(
@@ -65,96 +88,218 @@ BEFORE_AFTER = re.compile(
 
 def extract_rewrites(feedback: str):
     rewrites = [{"before": b.strip(), "after": a.strip()} for b, a in BEFORE_AFTER.findall(feedback)]
-    print("[extract_rewrites] Extracted rewrites:", rewrites)
+    logger.debug("Extracted %d rewrites: %s", len(rewrites), rewrites)
     return rewrites
 
+class RewriteStreamParser:
+    """
+    Incremental version of extract_rewrites for streamed completions.
+
+    feed() takes the next chunk of text and returns the Before/After pairs
+    completed by it. A pair counts as complete once its After line ends in a
+    newline followed by more text; close() flushes a final pair that runs to
+    end of text. The pairs collected over a whole stream equal
+    extract_rewrites(full_text).
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.rewrites: list[dict] = []
+        self._pos = 0
+
+    def _scan(self, final: bool) -> list[dict]:
+        new = []
+        while True:
+            m = BEFORE_AFTER.search(self.text, self._pos)
+            if not m:
+                break
+            # Matches that reach end-of-text may still grow with the next chunk
+            if not final and m.end() >= len(self.text):
+                break
+            rw = {"before": m.group(1).strip(), "after": m.group(2).strip()}
+            new.append(rw)
+            self._pos = m.end()
+        self.rewrites.extend(new)
+        return new
+
+    def feed(self, chunk: str) -> list[dict]:
+        self.text += chunk
+        return self._scan(final=False)
+
+    def close(self) -> list[dict]:
+        return self._scan(final=True)
+
 # strip leading bullet symbols/spaces for matching
 BULLET_PREFIX = re.compile(r"^[\s•\-\*\u2022\u25E6\u2043\u22190-9.)]+")
 
 def clean(text: str) -> str:
     return BULLET_PREFIX.sub("", text).strip()
 
-def replace_bullets_whole_text(original_text: str, rewrites):
+NORM_STRIP_RE = re.compile(r"[^a-z0-9%+.$/ ]+")
+FUZZY_THRESHOLD = 0.82
+FUZZY_CANDIDATES = 8   # lines verified with SequenceMatcher per fuzzy lookup
+
+def split_prefix(line: str):
+    # Return (prefix_including_bullet, content_without_prefix)
+    m = BULLET_RE.match(line)
+    if m:
+        return m.group(0), line[m.end():]
+    return "", line.strip()
+
+def norm(txt: str) -> str:
+    # Strip bullet prefix, collapse spaces, lowercase, remove most punctuation
+    stripped = clean(txt)
+    stripped = NORM_STRIP_RE.sub(" ", stripped.lower())
+    return " ".join(stripped.split())
+
+def shingles(txt: str, n: int = 3) -> set[str]:
+    return {txt[i:i + n] for i in range(len(txt) - n + 1)}
+
+class BulletMatcher:
     """
-    Replace each 'before' bullet from feedback with its 'after' text in the
-    original resume, line by line, preserving the original bullet prefix.
+    Index of one resume's lines for locating 'before' bullets.
 
-    Matching is robust to leading bullet symbols, extra whitespace, and case.
-    We try: exact normalized match → contains either way → fuzzy match.
+    Built once per resume: a normalized-text hash map answers exact hits,
+    and a character-trigram inverted index narrows containment and fuzzy
+    matching to lines that share text with the target, so only a handful
+    of candidates are ever compared with difflib. The index follows each
+    replacement, so later rewrites see the updated lines.
+    """
+
+    def __init__(self, original_text, parts=None):
+        # original_text may also be a list of lines; parts, if given, are their
+        # precomputed (prefix, content, normalized) triples
+        self.lines = original_text.splitlines() if isinstance(original_text, str) else list(original_text)
+        self.parts: list[tuple[str, str, str]] = []     # (prefix, content, normalized)
+        self._exact: dict[str, list[int]] = collections.defaultdict(list)
+        self._postings: dict[str, set[int]] = collections.defaultdict(set)
+        self._grams: list[set[str]] = []
+        self._short: set[int] = set()                   # non-empty lines too short to shingle
+        for i, ln in enumerate(self.lines):
+            if parts is None:
+                prefix, content = split_prefix(ln)
+                self.parts.append((prefix, content, norm(content)))
+            else:
+                self.parts.append(parts[i])
+            self._grams.append(set())
+            self._index(i)
+
+    def _index(self, i: int):
+        content_norm = self.parts[i][2]
+        self._exact[content_norm].append(i)
+        self._exact[content_norm].sort()
+        grams = shingles(content_norm)
+        self._grams[i] = grams
+        for g in grams:
+            self._postings[g].add(i)
+        if content_norm and not grams:
+            self._short.add(i)
+
+    def _unindex(self, i: int):
+        content_norm = self.parts[i][2]
+        self._exact[content_norm].remove(i)
+        for g in self._grams[i]:
+            self._postings[g].discard(i)
+        self._short.discard(i)
+
+    def find(self, before: str):
+        """Return (line_index, method, score); line_index is None when not found."""
+        target_norm = norm(before)
+        if not target_norm:
+            return None, "not_found", 0.0
+
+        # Pass 1: exact normalized match
+        exact = self._exact.get(target_norm)
+        if exact:
+            return exact[0], "exact", 1.0
+
+        # Shared-trigram counts per line drive both remaining passes
+        target_grams = shingles(target_norm)
+        overlap: collections.Counter[int] = collections.Counter()
+        for g in target_grams:
+            overlap.update(self._postings.get(g, ()))
+
+        # Pass 2: contains match (either direction); blank lines never match
+        contains = [
+            i for i, shared in overlap.items()
+            if shared == len(target_grams) or shared == len(self._grams[i])
+        ]
+        contains.extend(self._short)
+        if not target_grams:
+            # Targets too short to shingle: fall back to a plain scan
+            contains = range(len(self.parts))
+        for i in sorted(contains):
+            content_norm = self.parts[i][2]
+            if content_norm and (target_norm in content_norm or content_norm in target_norm):
+                return i, "contains", 1.0
+
+        # Pass 3: fuzzy match, verifying only the best trigram candidates
+        import difflib
+        ranked = sorted(
+            overlap,
+            key=lambda i: (-2 * overlap[i] / (len(target_grams) + len(self._grams[i])), i),
+        )[:FUZZY_CANDIDATES]
+        best_i, best_score = None, 0.0
+        for i in sorted(ranked):
+            sm = difflib.SequenceMatcher(None, self.parts[i][2], target_norm)
+            # Cheap upper bounds first; skip lines that cannot beat the threshold
+            if sm.real_quick_ratio() < FUZZY_THRESHOLD or sm.quick_ratio() < FUZZY_THRESHOLD:
+                continue
+            score = sm.ratio()
+            if score > best_score:
+                best_i, best_score = i, score
+        if best_i is not None and best_score >= FUZZY_THRESHOLD:
+            return best_i, "fuzzy", best_score
+        return None, "not_found", best_score
+
+    def replace(self, i: int, after: str, normalized: str | None = None):
+        prefix = self.parts[i][0]
+        self._unindex(i)
+        self.lines[i] = f"{prefix}{after}"
+        self.parts[i] = (prefix, after, norm(after) if normalized is None else normalized)
+        self._index(i)
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+def match_bullets(original_text: str, rewrites):
     """
-    def split_prefix(line: str):
-        # Return (prefix_including_bullet, content_without_prefix)
-        m = re.match(r"^\s*(?:[\u2022\u2023\u25E6\u2043\u2219\-\*\u00B7]|[0-9]+[.)])\s*", line)
-        if m:
-            return m.group(0), line[m.end():]
-        return "", line.strip()
-
-    def norm(txt: str) -> str:
-        # Strip bullet prefix, collapse spaces, lowercase, remove most punctuation
-        stripped = clean(txt)
-        stripped = re.sub(r"[^a-z0-9%+.$/ ]+", " ", stripped.lower())
-        return " ".join(stripped.split())
-
-    def sim(a: str, b: str) -> float:
-        return difflib.SequenceMatcher(None, a, b).ratio()
-
-    lines = original_text.splitlines()
-    #normalized contents for faster matching
-    line_parts = [] 
-    for ln in lines:
-        prefix, content = split_prefix(ln)
-        line_parts.append((prefix, content, norm(content)))
+    Apply rewrites like replace_bullets_whole_text and also return a report.
 
+    The report has one dict per rewrite: before, after, method ("exact",
+    "contains", "fuzzy", "not_found" or "skipped"), score and line (the
+    replaced line index, or None).
+    """
+    matcher = BulletMatcher(original_text)
+    report = []
     for rw in rewrites:
         before = rw.get("before", "").strip()
         after = rw.get("after", "").strip()
+        entry = {"before": before, "after": after, "method": "skipped", "score": 0.0, "line": None}
+        report.append(entry)
         if not before or not after:
-            print("[replace_bullets] Skipping empty pair:", rw)
-            continue
-
-        target_norm = norm(before)
-        replaced = False
-
-        # Pass 1: exact normalized match
-        for i, (prefix, content, content_norm) in enumerate(line_parts):
-            if content_norm == target_norm:
-                print(f"[replace_bullets] Exact match → replacing line {i}: '{content[:60]}...'")
-                lines[i] = f"{prefix}{after}"
-                line_parts[i] = (prefix, after, norm(after))
-                replaced = True
-                break
-        if replaced:
+            logger.debug("Skipping empty pair: %r", rw)
             continue
 
-        # Pass 2: contains match (either direction)
-        for i, (prefix, content, content_norm) in enumerate(line_parts):
-            if target_norm and (target_norm in content_norm or content_norm in target_norm):
-                print(f"[replace_bullets] Contains match → replacing line {i}: '{content[:60]}...'")
-                lines[i] = f"{prefix}{after}"
-                line_parts[i] = (prefix, after, norm(after))
-                replaced = True
-                break
-        if replaced:
+        i, method, score = matcher.find(before)
+        entry.update(method=method, score=round(score, 3), line=i)
+        if i is None:
+            logger.info("Bullet NOT found (best %.2f): %r", score, before[:70])
             continue
+        logger.debug("%s match (%.2f) -> replacing line %d: %r", method, score, i, matcher.parts[i][1][:60])
+        matcher.replace(i, after)
 
-        # Pass 3: fuzzy match using difflib
-        best_i, best_score = -1, 0.0
-        for i, (_, content, content_norm) in enumerate(line_parts):
-            score = sim(content_norm, target_norm)
-            if score > best_score:
-                best_score = score
-                best_i = i
-        if best_score >= 0.82 and best_i >= 0:
-            prefix, content, _ = line_parts[best_i]
-            print(f"[replace_bullets] Fuzzy match ({best_score:.2f}) → replacing line {best_i}: '{content[:60]}...'")
-            lines[best_i] = f"{prefix}{after}"
-            line_parts[best_i] = (prefix, after, norm(after))
-            replaced = True
+    return matcher.text(), report
 
-        if not replaced:
-            print(f"[replace_bullets] NOT found → '{before[:70]}...'")
+def replace_bullets_whole_text(original_text: str, rewrites):
+    """
+    Replace each 'before' bullet from feedback with its 'after' text in the
+    original resume, line by line, preserving the original bullet prefix.
 
-    return "\n".join(lines)
+    Matching is robust to leading bullet symbols, extra whitespace, and case.
+    We try: exact normalized match → contains either way → fuzzy match.
+    """
+    return match_bullets(original_text, rewrites)[0]
 
 HEADINGS = {
     "education","work experience","experience","skills","projects",
@@ -162,6 +307,8 @@ HEADINGS = {
     "summary","objective","awards"
 }
 
+HEADING_RE = re.compile(r"^[A-Z][A-Za-z &/\\-]+$")
+
 def is_heading(s: str) -> bool:
     t = s.strip()
     if not t:
@@ -170,27 +317,25 @@ def is_heading(s: str) -> bool:
         return True
     if t.lower() in HEADINGS:
         return True
-    if re.match(r"^[A-Z][A-Za-z &/\\-]+$", t) and len(t.split()) <= 6:
+    if HEADING_RE.match(t) and len(t.split()) <= 6:
         return True
     return False
 
-job_role_to_industry = {
-    "Software Engineer": "Tech / Software Engineering",
-    "Data Scientist": "Tech / Data Science & AI",
-    "Product Manager": "Tech / Product Strategy",
-    "UX Designer": "Design / User Experience",
-    "Cybersecurity Analyst": "Information Security"
-}
-
 STOP = {
     "a","an","the","and","or","to","for","of","in","on","with",
     "by","from","at","as","is","are","be","was","were","this","that",
     "it","its","your","you","our","we","they","their"
 }
 
+KEYWORD_TOKEN_STRIP_RE = re.compile(r"[^A-Za-z0-9 ]+")
+
+def keyword_tokens(text: str) -> List[str]:
+    #lowercased words of 3+ characters that are not stopwords, as top_keywords sees them
+    text = KEYWORD_TOKEN_STRIP_RE.sub(" ", text.lower())
+    return [t for t in text.split() if t not in STOP and len(t) > 2]
+
 def top_keywords(job_desc: str, k: int = 9) -> List[str]:
-    text = re.sub(r"[^A-Za-z0-9 ]+", " ", job_desc.lower())
-    tokens = [t for t in text.split() if t not in STOP and len(t) > 2]
+    tokens = keyword_tokens(job_desc)
 
     #unigram counts
     unigram_counter = collections.Counter(tokens)
@@ -231,42 +376,125 @@ ACTION_VERBS = {
     "led","built","designed","developed","implemented","created","deployed","optimized",
     "improved","automated","reduced","increased","launched","managed"
 }
+#one pass finds every action verb used (word boundaries fix each match to one verb)
+ACTION_VERB_RE = re.compile(r"\b(" + "|".join(sorted(ACTION_VERBS)) + r")\b")
+NUMBER_RE = re.compile(r"\b\d[\d,\.]*\b")
+SECTIONS_NEEDED = ("experience","education","skills")
+
+class JobDescriptionIndex:
+    """
+    Keywords of one job description, ranked once and compiled for matching.
+
+    keyword_hits() finds every keyword contained in a resume in a single
+    regex pass instead of one substring scan per keyword, with the same
+    result as `kw.lower() in resume_txt.lower()` for each keyword. With
+    semantic=True a keyword also counts when the resume names the same
+    skill another way ("k8s" for "Kubernetes"), via skill_match.
+    """
+
+    def __init__(self, jd_txt: str, k: int = 20, keywords: List[str] | None = None, semantic: bool = False):
+        # keywords, if given, are a previously ranked list (e.g. stored in a job catalog)
+        self.jd_txt = jd_txt
+        self.keywords = top_keywords(jd_txt, k) if keywords is None else list(keywords)
+        self.lowered = [kw.lower() for kw in self.keywords]
+        # Zero-width lookahead so overlapping keywords are all visited; longest first
+        alts = sorted(set(self.lowered), key=len, reverse=True)
+        self._matcher = re.compile("(?=(" + "|".join(map(re.escape, alts)) + "))") if alts else None
+        self.semantic = semantic
+        self._skills = None
+        if semantic:
+            from skill_match import SkillMatcher   # NumPy and the skill index, only when asked for
+            self._skills = SkillMatcher(self.lowered)
+
+    def exact_hits(self, resume_lower: str) -> set[str]:
+        if self._matcher is None:
+            return set()
+        found = set(self._matcher.findall(resume_lower))
+        # A keyword shadowed by a longer one at the same offset is contained in it
+        return {kw for kw in self.lowered if kw in found or any(kw in f for f in found)}
+
+    def keyword_hits(self, resume_lower: str) -> set[str]:
+        hits = self.exact_hits(resume_lower)
+        if self._skills is not None and len(hits) < len(set(self.lowered)):
+            hits.update(kw for kw, m in zip(self.lowered, self._skills.matches(resume_lower)) if m is not None)
+        return hits
+
+    def keyword_matches(self, resume_txt: str) -> List[dict]:
+        """
+        Per-keyword breakdown: how each keyword was matched ("exact", "skill"
+        or None), the resume phrase and skill it matched through, and the
+        keyword/skill similarity.
+        """
+        lower = resume_txt.lower()
+        exact = self.exact_hits(lower)
+        skills = self._skills.matches(lower) if self._skills is not None else [None] * len(self.lowered)
+        rows = []
+        for kw, low, m in zip(self.keywords, self.lowered, skills):
+            if low in exact:
+                rows.append({"keyword": kw, "match": "exact", "phrase": low, "skill": None, "similarity": 1.0})
+            elif m is not None:
+                rows.append({"keyword": kw, "match": "skill", "phrase": m.phrase, "skill": m.skill,
+                             "similarity": m.similarity})
+            else:
+                rows.append({"keyword": kw, "match": None, "phrase": None, "skill": None, "similarity": 0.0})
+        return rows
+
+    def keyword_score(self, resume_txt: str, weight=50):
+        hits = self.keyword_hits(resume_txt.lower())
+        return weight * sum(1 for kw in self.lowered if kw in hits) / len(self.keywords or [1])
+
+@functools.lru_cache(maxsize=32)
+def jd_index(jd_txt: str, semantic: bool = False) -> JobDescriptionIndex:
+    """Shared index per job description, so rescoring never re-ranks the JD."""
+    return JobDescriptionIndex(jd_txt, semantic=semantic)
 
 #checks amount of keywords in the updated resume
-def keyword_score(resume_txt: str, jd_txt: str, weight=50):
-    kws  = top_keywords(jd_txt, 20)                # pick 20 most salient
-    hits = sum(1 for kw in kws if kw.lower() in resume_txt.lower())
-    return weight * hits / len(kws or [1])
+def keyword_score(resume_txt: str, jd_txt, weight=50, semantic=False):
+    #20 most salient JD keywords, ranked once per JD
+    index = jd_txt if isinstance(jd_txt, JobDescriptionIndex) else jd_index(jd_txt, semantic)
+    return index.keyword_score(resume_txt, weight)
 
 #checks if necessary sections are available
 def section_score(resume_txt: str, weight=15):
-    need = ["experience","education","skills"]
-    have = sum(1 for s in need if s in resume_txt.lower())
-    return weight * have / len(need)
+    lower = resume_txt.lower()
+    have = sum(1 for s in SECTIONS_NEEDED if s in lower)
+    return weight * have / len(SECTIONS_NEEDED)
+
+#any line starting with a bullet glyph or "1." / "1)" counts, not only "•" and "-"
+def count_bullets(resume_txt: str) -> int:
+    return sum(1 for ln in resume_txt.splitlines() if BULLET_RE.match(ln))
+
+#the *_points helpers turn counted features into sub-scores, shared with ResumeDocument
+def impact_points(nums: int, bullets: int, weight=15):
+    ratio = min(1, nums / max(1, bullets))        # want at least 1 number per bullet
+    return weight * ratio
+
+def verb_points(verbs: int, weight=10):
+    return weight * min(1, verbs/15)
+
+def length_points(words: int, weight=10):
+    if 250 <= words <= 900:   return weight
+    if words < 150:           return weight*0.3
+    if words > 1200:          return weight*0.3
+    return weight*0.6                                  # borderline
 
 #checks amount of numerical metrics in each bullet point(If atleast 1 is present in each bullet point then complete marks are given)
 def impact_score(resume_txt: str, weight=15):
-    nums = len(re.findall(r"\b\d[\d,\.]*\b", resume_txt))
-    bullets = max(1, resume_txt.count("\n•")+resume_txt.count("\n-"))
-    ratio = min(1, nums / bullets)                # want at least 1 number per bullet
-    return weight * ratio
+    return impact_points(len(NUMBER_RE.findall(resume_txt)), count_bullets(resume_txt), weight)
 
 #checks amount of action verbs used(At 15 function gives full point)
 def verb_score(resume_txt: str, weight=10):
-    verbs = sum(1 for v in ACTION_VERBS if re.search(fr"\b{v}\b", resume_txt.lower()))
-    return weight * min(1, verbs/15)         
+    return verb_points(len(set(ACTION_VERB_RE.findall(resume_txt.lower()))), weight)
 
 #checks the length of the resume and assigns a score
 def length_score(resume_txt: str, weight=10):
-    words = len(resume_txt.split())
-    if 250 <= words <= 900:   return weight           
-    if words < 150:           return weight*0.3
-    if words > 1200:          return weight*0.3
-    return weight*0.6                                  # borderline
+    return length_points(len(resume_txt.split()), weight)
 
-def ats_score(resume_txt: str, jd_txt: str="") -> int:
+def ats_score(resume_txt: str, jd_txt="", semantic=False) -> int:
+    # jd_txt may be a raw job description or a prebuilt JobDescriptionIndex;
+    # semantic=True also counts skill synonyms as keyword hits (see skill_match)
     return round(
-          keyword_score(resume_txt, jd_txt)
+          keyword_score(resume_txt, jd_txt, semantic=semantic)
         + section_score(resume_txt)
         + impact_score(resume_txt)
         + verb_score(resume_txt)
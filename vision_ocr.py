@@ -1,26 +1,253 @@
-import base64, io
-from pdf2image import convert_from_bytes
-from PIL import Image
+import base64, io, math, os
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
-def pdf_pages_to_base64_images(pdf_bytes, dpi=200, max_dim=1600):
+import metrics
+from uploads import source_path
+
+# format name -> (PIL encoder, MIME type for the data URL)
+IMAGE_FORMATS = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+@dataclass(frozen=True)
+class PayloadPolicy:
+    """
+    How pages are rendered and encoded for the vision request.
+
+    dpi=None renders at the DPI needed for the page's long side to reach
+    max_dim instead of rendering large and thumbnailing. Budgets are checked
+    against the base64 request size and the estimated vision tokens; when
+    over budget, `droppable_pages` (1-based, e.g. pages whose text layer
+    already carries the content) go first, then every page is downscaled
+    until it fits or reaches min_dim.
+    """
+    max_dim: int = 1600
+    dpi: int | None = 200
+    image_format: str = "png"
+    quality: int = 85
+    grayscale: bool = False
+    png_colors: int | None = None
+    max_total_bytes: int | None = None
+    max_total_tokens: int | None = None
+    droppable_pages: tuple[int, ...] = ()
+    min_dim: int = 512
+
+    @property
+    def mime_type(self):
+        return IMAGE_FORMATS[self.image_format][1]
+
+def _default_workers():
+    return max(1, min(4, os.cpu_count() or 1))
+
+def _render_dpi(policy, info):
+    if policy.dpi:
+        return policy.dpi
+    # pdfinfo reports e.g. "612 x 792 pts (letter)"
+    try:
+        w_pts, _, h_pts = info["Page size"].split()[:3]
+        long_side_in = max(float(w_pts), float(h_pts)) / 72
+    except (KeyError, ValueError):
+        return 200
+    return max(36, min(300, math.ceil(policy.max_dim / long_side_in)))
+
+def estimate_image_tokens(width, height):
+    """Vision token cost of one high-detail image (fit 2048, short side 768, 512px tiles)."""
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+def _swap(current, new, original):
+    # Close intermediate conversions as soon as they are replaced; the caller owns `original`
+    if current is not original:
+        current.close()
+    return new
+
+def _encode_image(img, policy, max_dim):
+    """Encode one page; returns (memoryview of the encoder's buffer, (width, height))."""
+    #resize to stay under 4096×4096 vision limits
+    if max(img.size) > max_dim:
+        img.thumbnail((max_dim, max_dim))
+    out = img
+    if policy.grayscale and out.mode != "L":
+        out = _swap(out, out.convert("L"), img)
+    fmt = IMAGE_FORMATS[policy.image_format][0]
+    params = {}
+    if fmt == "PNG":
+        if policy.png_colors:
+            out = _swap(out, out.quantize(colors=policy.png_colors), img)
+    else:
+        if out.mode not in ("L", "RGB"):
+            out = _swap(out, out.convert("RGB"), img)
+        params["quality"] = policy.quality
+    buf = io.BytesIO()
+    out.save(buf, format=fmt, **params)
+    size = out.size
+    if out is not img:
+        out.close()
+    # A view of the buffer, not a getvalue() copy; it is freed with the view
+    return buf.getbuffer(), size
+
+def _encode_b64(img, policy, max_dim):
+    """Encode one page straight to base64 text; the raw encoder buffer is freed on return."""
+    data, size = _encode_image(img, policy, max_dim)
+    return base64.b64encode(data).decode("ascii"), size
+
+def _encode_page(page_no, img, policy):
+    # Runs on the worker pool: resize, encode and base64 in one go, off the consumer thread
+    b64, size = _encode_b64(img, policy, policy.max_dim)
+    img.close()
+    return page_no, b64, size
+
+def _page_batches(n_pages, pages, batch):
+    # Contiguous runs of requested pages, at most `batch` long
+    wanted = sorted(set(pages)) if pages is not None else list(range(1, n_pages + 1))
+    wanted = [p for p in wanted if 1 <= p <= n_pages]
+    run = []
+    for p in wanted:
+        if run and (p != run[-1] + 1 or len(run) == batch):
+            yield run[0], run[-1]
+            run = []
+        run.append(p)
+    if run:
+        yield run[0], run[-1]
+
+def iter_encoded_pages(pdf_bytes, policy=None, workers=None, pages=None):
+    """
+    Yield (page_no, b64, (width, height)) for each page, in order; `b64` is
+    the encoded image as base64 text, produced on the worker pool.
+
+    Pages are rendered by poppler in batches of `workers` pages
+    (first_page/last_page + thread_count) while a thread pool resizes and
+    encodes the previous batch, so at most about two batches of full-DPI
+    images are alive at once. `pages` limits rendering to those 1-based pages.
+    """
+    policy = policy or PayloadPolicy()
+    workers = workers or _default_workers()
+    # A StoredUpload is rendered from its own file; raw bytes are written out once
+    with source_path(pdf_bytes) as path:
+        # poppler bindings load on first render, not at import
+        from pdf2image import convert_from_path, pdfinfo_from_path
+
+        info = pdfinfo_from_path(path)
+        dpi = _render_dpi(policy, info)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = collections.deque()
+            for first, last in _page_batches(info["Pages"], pages, workers):
+                rendered = convert_from_path(
+                    path, dpi=dpi, first_page=first, last_page=last, thread_count=workers
+                )
+                for page_no, img in zip(range(first, last + 1), rendered):
+                    pending.append(pool.submit(_encode_page, page_no, img, policy))
+                del rendered
+                # Hand finished pages out, leaving one batch encoding while the next renders
+                while len(pending) > workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+def _to_block(b64, policy):
+    url = f"data:{policy.mime_type};base64," + b64
+    return {
+        "type": "image_url",
+        "image_url": {"url": url}
+    }
+
+def iter_pdf_page_images(pdf_bytes, dpi=200, max_dim=1600, workers=None, policy=None, pages=None):
+    """Yield one vision content block per PDF page, in page order."""
+    policy = policy or PayloadPolicy(max_dim=max_dim, dpi=dpi)
+    for _, b64, _ in iter_encoded_pages(pdf_bytes, policy, workers=workers, pages=pages):
+        yield _to_block(b64, policy)
+
+def _over_budget(kept, policy):
+    if policy.max_total_bytes and sum(len(e["data"]) for e in kept) > policy.max_total_bytes:
+        return True
+    if policy.max_total_tokens and sum(estimate_image_tokens(*e["size"]) for e in kept) > policy.max_total_tokens:
+        return True
+    return False
+
+def _apply_budget(entries, policy):
+    kept = list(entries)
+    # 1) drop pages the text layer already covers, last first, keeping at least one
+    for page_no in sorted(policy.droppable_pages, reverse=True):
+        if not _over_budget(kept, policy) or len(kept) == 1:
+            break
+        kept = [e for e in kept if e["page"] != page_no] or kept
+
+    # 2) shrink every remaining page until the budget fits or min_dim is reached. Each step
+    #    re-encodes from the page's first encoding at a smaller target, so lossy formats lose
+    #    quality once rather than once per step
+    sources = {e["page"]: (e["data"], max(e["size"])) for e in kept}
+    scale = 1.0
+    while _over_budget(kept, policy):
+        scale *= 0.8
+        shrunk = False
+        for e in kept:
+            source, source_long = sources[e["page"]]
+            target = max(policy.min_dim, int(source_long * scale))
+            if target >= max(e["size"]):
+                continue
+            from PIL import Image
+
+            with Image.open(io.BytesIO(base64.b64decode(source))) as img:
+                img.load()
+                e["data"], e["size"] = _encode_b64(img, policy, target)
+            shrunk = True
+        if not shrunk:
+            break
+    return kept
+
+def pdf_pages_to_payload(pdf_bytes, policy=None, workers=None, pages=None):
+    """
+    Encode pages under `policy` and enforce its byte/token budget.
+
+    Returns (content_blocks, report) where report has one dict per rendered
+    page: page, width, height, bytes (base64 size), tokens and dropped.
+
+    Pages are base64-encoded on the worker pool as they are encoded, so the
+    raw image buffer never outlives its worker call and the consumer thread
+    only joins each page's text into a data URL.
+    """
+    policy = policy or PayloadPolicy()
+    with metrics.span("render_pages", format=policy.image_format) as sp:
+        entries = [
+            {"page": page_no, "data": data, "size": size}
+            for page_no, data, size in iter_encoded_pages(pdf_bytes, policy, workers=workers, pages=pages)
+        ]
+        kept = _apply_budget(entries, policy)
+        sp["pages"] = len(entries)
+    kept_pages = {e["page"] for e in kept}
+    for e in entries:
+        e["bytes"] = len(e["data"])
+        if e["page"] not in kept_pages:
+            del e["data"]
+
+    with metrics.span("data_urls") as sp:
+        blocks = [_to_block(e.pop("data"), policy) for e in kept]
+        sp["bytes"] = sum(e["bytes"] for e in kept)
+    report = [
+        {
+            "page": e["page"],
+            "width": e["size"][0],
+            "height": e["size"][1],
+            "bytes": e["bytes"],
+            "tokens": estimate_image_tokens(*e["size"]),
+            "dropped": e["page"] not in kept_pages,
+        }
+        for e in entries
+    ]
+    return blocks, report
+
+def pdf_pages_to_base64_images(pdf_bytes, dpi=200, max_dim=1600, workers=None):
     """
     Convert each PDF page to a base-64 PNG string suitable for GPT-Vision.
     Returns a list of content blocks for Chat Completions vision:
     {"type": "image_url", "image_url": {"url": "data:image/png;base64,..."}}
     """
-    pagesImage = convert_from_bytes(pdf_bytes, dpi=dpi)       
-    msgs  = []
-    for img in pagesImage:
-        #resize to stay under 4096×4096 vision limits
-        if max(img.size) > max_dim:
-            img.thumbnail((max_dim, max_dim))
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        b64 = base64.b64encode(buf.getvalue()).decode()
-        msgs.append(
-            {
-                "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{b64}"}
-            }
-        )
-    return msgs
\ No newline at end of file
+    return list(iter_pdf_page_images(pdf_bytes, dpi=dpi, max_dim=max_dim, workers=workers))